@@ -0,0 +1,160 @@
+"""
+Changelist settings for the large catalog tables.
+
+Django's stock changelist is built for small tables. On products, images,
+reviews and vendors it does three kinds of wasted work on every page:
+
+- RelatedFieldListFilter loads every related row to render the sidebar, so
+  filtering by vendor lists every vendor on every page load.
+- It runs two COUNT(*) queries: one for the filtered rows and one for the
+  "N total" link. On PostgreSQL and InnoDB each is a full scan.
+- Without list_select_related, each foreign key column in list_display
+  costs one query per row.
+
+LargeTableAdminMixin switches those off for a ModelAdmin:
+
+- EstimatedCountPaginator takes the row count of an unfiltered changelist
+  from the database's table statistics (pg_class.reltuples,
+  information_schema.TABLES or sqlite_stat1) once the table is large.
+  Filtered lists and small tables are still counted exactly.
+- show_full_result_count and facet counts are disabled.
+- The default ordering is '-pk', which the primary key index serves
+  directly. The stock '-created_at' order plus its '-pk' tie-breaker
+  needs a sort.
+- AutocompleteFilter renders a foreign key filter as the admin's select2
+  autocomplete widget. Only the selected row is loaded, and options come
+  from the related ModelAdmin's search_fields as the user types.
+
+query_budget is the most queries a changelist page may run. The
+check_admin_queries command renders each changelist and compares it with
+this budget.
+"""
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.utils import get_fields_from_path
+from django.contrib.admin.views.main import PAGE_VAR
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+# below this many rows an exact COUNT(*) is cheap enough and always right
+ESTIMATE_THRESHOLD = 50_000
+
+
+def estimated_row_count(model, using='default'):
+    """Row count of ``model``'s table from planner statistics, or None when there are none"""
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql, params = 'SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [connection.ops.quote_name(table)]
+    elif connection.vendor == 'mysql':
+        sql = 'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s'
+        params = [table]
+    elif connection.vendor == 'sqlite':
+        # filled in by ANALYZE / PRAGMA optimize; the first number of each stat is the table's row count
+        sql, params = 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table]
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    try:
+        estimate = int(float(str(row[0]).split()[0]))
+    except ValueError:
+        return None
+    # reltuples is -1 for a table that has never been analyzed
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that reads the size of an unfiltered, large table from statistics instead of COUNT(*)"""
+
+    threshold = ESTIMATE_THRESHOLD
+
+    def _is_whole_table(self):
+        query = getattr(self.object_list, 'query', None)
+        return (
+            query is not None
+            and not query.where
+            and not query.distinct
+            and not query.combinator
+            and not query.is_sliced
+        )
+
+    @cached_property
+    def count(self):
+        if self._is_whole_table():
+            estimate = estimated_row_count(self.object_list.model, self.object_list.db)
+            if estimate is not None and estimate >= self.threshold:
+                return estimate
+        return super().count
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """Foreign key filter backed by the admin autocomplete view instead of a list of every related row
+
+    The related model's ModelAdmin needs search_fields, as for autocomplete_fields.
+    """
+
+    template = 'admin/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        super().__init__(field, request, params, model, model_admin, field_path)
+        values = [value for value in self.used_parameters.pop(self.lookup_kwarg, []) if value]
+        if values:
+            self.used_parameters[self.lookup_kwarg] = values
+        self.lookup_val = values[0] if values else None
+        if hasattr(field, 'verbose_name'):
+            self.title = field.verbose_name
+        self.form_field = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            required=False,
+            widget=AutocompleteSelect(field, model_admin.admin_site, attrs={'onchange': 'this.form.submit()'}),
+        )
+        self.hidden_params = [
+            (name, value)
+            for name, values in request.GET.lists()
+            if name not in (self.lookup_kwarg, PAGE_VAR)
+            for value in values
+        ]
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def widget(self):
+        return self.form_field.widget.render(self.lookup_kwarg, self.lookup_val)
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': _('All'),
+        }
+
+
+class LargeTableAdminMixin:
+    """ModelAdmin defaults for tables too large for the stock changelist"""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    ordering = ('-pk',)
+    # most queries one changelist page may run (see the check_admin_queries command)
+    query_budget = None
+
+    @property
+    def media(self):
+        media = super().media
+        for item in self.list_filter:
+            if isinstance(item, (list, tuple)) and issubclass(item[1], AutocompleteFilter):
+                field = get_fields_from_path(self.model, item[0])[-1]
+                return media + AutocompleteSelect(field, self.admin_site).media
+        return media
@@ -0,0 +1,8 @@
+"""
+Helpers for the ASGI-native views.
+"""
+
+
+async def alist(queryset):
+    """Evaluate a queryset with the async ORM"""
+    return [obj async for obj in queryset]
@@ -0,0 +1,111 @@
+"""
+Token authentication with an in-process lookup cache.
+
+Integrations that push inventory authenticate every call with the same
+token. DRF's TokenAuthentication then costs a token+user query, and the
+permission checks cost another query for ``request.user.vendor``.
+CachedTokenAuthentication keeps token -> (user, vendor, group names) in a
+bounded LRU with a TTL. Each request gets its own copy of the cached user,
+with the vendor already in place, so a warm call runs no queries at all.
+
+Entries are dropped straight away when a token is deleted, or when its user,
+the user's groups or the user's vendor change (see core.signals). Other
+worker processes learn about the change when their entry's TTL
+(TOKEN_AUTH_CACHE_TTL seconds) runs out.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+    """Thread-safe LRU of token key -> cache entry with a per-entry TTL"""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry['expires'] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, user, token, vendor, group_names):
+        """Store an entry and return it; with a zero size or TTL the entry is returned but not kept"""
+        entry = {
+            'user': user,
+            'token': token,
+            'vendor': vendor,
+            'group_names': group_names,
+            'expires': time.monotonic() + self.ttl,
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry['user'].pk == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache(
+    max_size=getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 60),
+)
+
+
+def _load(key, token_model):
+    try:
+        token = token_model.objects.select_related('user__vendor').get(key=key)
+    except token_model.DoesNotExist:
+        return None
+    user = token.user
+    vendor = getattr(user, 'vendor', None)
+    group_names = frozenset(user.groups.values_list('name', flat=True))
+    return token_cache.set(key, user, token, vendor, group_names)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        entry = token_cache.get(key)
+        if entry is None:
+            entry = _load(key, self.get_model())
+            if entry is None:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        # never hand the shared instance to a request - views may modify it
+        user = copy.copy(entry['user'])
+        user._state.fields_cache['vendor'] = entry['vendor']
+        user.group_names = entry['group_names']
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return (user, entry['token'])
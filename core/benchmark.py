@@ -0,0 +1,40 @@
+"""
+Small helpers shared by the benchmark management commands.
+"""
+import time
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed):
+    """Throughput and latency figures (ms) for a finished run"""
+    return {
+        'ops': len(latencies),
+        'ops_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'max_ms': (max(latencies) if latencies else 0.0) * 1000,
+    }
+
+
+def format_summary(label, summary):
+    return (
+        f"{label:<24} {summary['ops']:>8} ops  {summary['ops_per_sec']:>10.1f} ops/s  "
+        f"p50 {summary['p50_ms']:>7.2f}ms  p95 {summary['p95_ms']:>7.2f}ms  max {summary['max_ms']:>8.2f}ms"
+    )
+
+
+class Stopwatch:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,172 @@
+"""
+Single-flight caching for expensive catalog payloads.
+
+get_or_compute() stores each value in an envelope that records a soft
+expiry and how long the value took to compute. The cache entry itself lives
+STALE_GRACE seconds longer than the soft expiry, so an expired value is
+still there to fall back on.
+
+When a value has expired, or is picked for probabilistic early refresh
+(XFetch: the closer to expiry and the slower to compute, the likelier), the
+caller tries to take a short lock with cache.add(). Only the caller holding
+the lock recomputes. Everyone else serves the stale value straight away, or
+waits briefly for the fresh one when there is nothing stale to serve. A
+stampede of concurrent misses therefore costs one computation rather than
+one per worker.
+
+aget_or_compute() is the same for async views: the compute callable is a
+coroutine function, so its queries can run on the async ORM.
+
+generation()/bump_generation() provide counters for building keys that are
+invalidated in one step.
+
+Both rely on the default cache being shared by every worker (CACHES, set
+from REDIS_URL). A per-process LocMemCache only takes the lock and bumps the
+generation in the worker that handled the write. Other workers keep serving
+their own copy until it expires. With a local cache, every soft expiry is
+therefore capped at LOCAL_CACHE_TIMEOUT seconds.
+"""
+import asyncio
+import math
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+STALE_GRACE = 60 * 10
+LOCK_TIMEOUT = 30
+WAIT_SECONDS = 3.0
+POLL_INTERVAL = 0.05
+
+
+def is_shared(backend=None):
+    """False for a per-process cache, whose entries the other workers never see"""
+    return not isinstance(backend or caches['default'], LocMemCache)
+
+
+def _effective_timeout(timeout):
+    if is_shared():
+        return timeout
+    return min(timeout, getattr(settings, 'LOCAL_CACHE_TIMEOUT', 60))
+
+
+def _lock_key(key):
+    return f'{key}:lock'
+
+
+def _envelope(value, timeout, compute_time):
+    return {'value': value, 'expires': time.time() + timeout, 'delta': compute_time}
+
+
+def set_cached(key, value, timeout, compute_time=0.0):
+    """Store a value with a soft expiry of ``timeout`` seconds"""
+    timeout = _effective_timeout(timeout)
+    cache.set(key, _envelope(value, timeout, compute_time), timeout + STALE_GRACE)
+
+
+def get_cached(key, default=None):
+    """The stored value, fresh or stale, without triggering a refresh"""
+    envelope = cache.get(key)
+    return default if envelope is None else envelope['value']
+
+
+def delete_cached(key):
+    cache.delete(key)
+
+
+def _is_fresh(envelope, beta):
+    # XFetch: refresh early with a probability that rises towards the expiry
+    early = envelope['delta'] * beta * -math.log(1.0 - random.random())
+    return time.time() + early < envelope['expires']
+
+
+def _compute_and_store(key, compute, timeout):
+    start = time.perf_counter()
+    value = compute()
+    set_cached(key, value, timeout, time.perf_counter() - start)
+    return value
+
+
+def get_or_compute(key, compute, timeout, beta=1.0, wait=WAIT_SECONDS, lock_timeout=LOCK_TIMEOUT):
+    """Cached ``compute()`` with at most one concurrent recomputation per key"""
+    envelope = cache.get(key)
+    if envelope is not None and _is_fresh(envelope, beta):
+        return envelope['value']
+
+    lock_key = _lock_key(key)
+    token = uuid.uuid4().hex
+    if cache.add(lock_key, token, lock_timeout):
+        try:
+            return _compute_and_store(key, compute, timeout)
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    if envelope is not None:
+        # someone else is refreshing; stale is good enough meanwhile
+        return envelope['value']
+
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        envelope = cache.get(key)
+        if envelope is not None:
+            return envelope['value']
+        if cache.get(lock_key) is None:
+            break
+    # the lock holder is slow or died - compute rather than fail the request
+    return _compute_and_store(key, compute, timeout)
+
+
+async def _acompute_and_store(key, compute, timeout):
+    start = time.perf_counter()
+    value = await compute()
+    timeout = _effective_timeout(timeout)
+    await cache.aset(key, _envelope(value, timeout, time.perf_counter() - start), timeout + STALE_GRACE)
+    return value
+
+
+async def aget_or_compute(key, compute, timeout, beta=1.0, wait=WAIT_SECONDS, lock_timeout=LOCK_TIMEOUT):
+    """get_or_compute() for async callers; ``compute`` is a coroutine function"""
+    envelope = await cache.aget(key)
+    if envelope is not None and _is_fresh(envelope, beta):
+        return envelope['value']
+
+    lock_key = _lock_key(key)
+    token = uuid.uuid4().hex
+    if await cache.aadd(lock_key, token, lock_timeout):
+        try:
+            return await _acompute_and_store(key, compute, timeout)
+        finally:
+            if await cache.aget(lock_key) == token:
+                await cache.adelete(lock_key)
+
+    if envelope is not None:
+        return envelope['value']
+
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        envelope = await cache.aget(key)
+        if envelope is not None:
+            return envelope['value']
+        if await cache.aget(lock_key) is None:
+            break
+    return await _acompute_and_store(key, compute, timeout)
+
+
+def generation(name):
+    return cache.get(f'generation:{name}', 0)
+
+
+def bump_generation(name):
+    key = f'generation:{name}'
+    if cache.add(key, 1, None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
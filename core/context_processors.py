@@ -0,0 +1,130 @@
+"""
+Lazy, session-cached cart summary for every rendered page.
+
+cart_context only hands the template lazy objects, so pages that never show
+the cart badge run no cart queries at all. When the badge is rendered, the
+cart row is looked up, and the count and total come from the session as
+long as the cart's updated_at still matches the one stored with them. Every
+CartItem save or delete touches updated_at (see core.signals), so the stamp
+moves for every worker and every session of the same user. Items are only
+loaded again after such a change.
+
+The cart page uses ``cart_line_items``: the same items with products,
+vendors, variants and images loaded in one go.
+"""
+from decimal import Decimal
+
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject, cached_property
+
+CART_SUMMARY_SESSION_KEY = 'cart_summary'
+
+
+def cart_owner_key(user_id=None, session_key=None):
+    if user_id:
+        return f'user:{user_id}'
+    if session_key:
+        return f'session:{session_key}'
+    return None
+
+
+def _has_field(model, name):
+    try:
+        model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def cart_stamp(cart):
+    """Version of the cart's contents, or None when the Cart model cannot tell"""
+    updated_at = getattr(cart, 'updated_at', None)
+    return updated_at.isoformat() if updated_at else None
+
+
+def touch_cart(cart_id):
+    """Move the cart's stamp on after its items changed"""
+    cart_model = apps.get_model('orders', 'Cart')
+    if _has_field(cart_model, 'updated_at'):
+        cart_model.objects.filter(pk=cart_id).update(updated_at=timezone.now())
+
+
+def get_request_cart(request):
+    """The cart belonging to the current user (or anonymous session), if any"""
+    cart_model = apps.get_model('orders', 'Cart')
+    if request.user.is_authenticated:
+        return cart_model.objects.filter(user=request.user).first()
+    session_key = request.session.session_key
+    if not session_key or not _has_field(cart_model, 'session_key'):
+        return None
+    return cart_model.objects.filter(session_key=session_key).first()
+
+
+def cart_summary_items(cart):
+    """Cart items with product, vendor, variant and images loaded in one go"""
+    product_image_model = apps.get_model('products', 'ProductImage')
+    return list(
+        cart.items.select_related('product__vendor', 'variant').prefetch_related(
+            Prefetch('product__images', queryset=product_image_model.objects.order_by('-is_primary', 'order', 'id'))
+        )
+    )
+
+
+def compute_cart_summary(items):
+    return {
+        'count': sum(item.quantity for item in items),
+        'total': str(sum((item.total_price for item in items), Decimal('0'))),
+    }
+
+
+class RequestCart:
+    """The request's cart and its items, each loaded at most once per request"""
+
+    def __init__(self, request):
+        self.request = request
+
+    @cached_property
+    def cart(self):
+        return get_request_cart(self.request)
+
+    @cached_property
+    def items(self):
+        return cart_summary_items(self.cart) if self.cart is not None else []
+
+
+def _owner(request):
+    user_id = request.user.pk if request.user.is_authenticated else None
+    return cart_owner_key(user_id, request.session.session_key)
+
+
+def get_cart_summary(request, request_cart=None):
+    """{'count', 'total'} from the session, recomputed only after a cart change"""
+    owner = _owner(request)
+    if owner is None:
+        # anonymous visitor without a session cannot have a cart yet
+        return {'count': 0, 'total': '0'}
+    request_cart = request_cart or RequestCart(request)
+    if request_cart.cart is None:
+        return {'count': 0, 'total': '0'}
+    stamp = cart_stamp(request_cart.cart)
+    summary = request.session.get(CART_SUMMARY_SESSION_KEY)
+    if stamp and summary and summary.get('owner') == owner and summary.get('stamp') == stamp:
+        return summary
+    summary = compute_cart_summary(request_cart.items)
+    summary.update(owner=owner, stamp=stamp)
+    request.session[CART_SUMMARY_SESSION_KEY] = summary
+    return summary
+
+
+def cart_context(request):
+    request_cart = RequestCart(request)
+    summary = SimpleLazyObject(lambda: get_cart_summary(request, request_cart))
+    return {
+        'cart_summary': summary,
+        'cart_items_count': SimpleLazyObject(lambda: summary['count']),
+        'cart_total': SimpleLazyObject(lambda: Decimal(summary['total'])),
+        'cart_line_items': SimpleLazyObject(lambda: request_cart.items),
+    }
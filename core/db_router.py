@@ -0,0 +1,48 @@
+"""
+Primary/replica database routing.
+
+Writes always go to ``default``. Reads go to ``default`` too unless the
+current request has been marked replica-safe by ReplicaRoutingMiddleware:
+a safe-method request to a view with ``use_read_replica = True`` or to a
+DRF list action, from a client that has not written recently. Replica
+aliases are every DATABASES entry whose name starts with ``replica``.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY_DB = 'default'
+
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica')]
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """Route reads inside the block to a replica (or back to the primary)"""
+    token = _read_from_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get():
+            replicas = replica_aliases()
+            if replicas:
+                return random.choice(replicas)
+        return PRIMARY_DB
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        return True
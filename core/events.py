@@ -0,0 +1,180 @@
+"""
+Catalog change-event bus.
+
+Models publish ChangeEvents when rows are saved or deleted, from model
+signals or explicitly from bulk code paths. Events are only delivered after
+the surrounding transaction commits (transaction.on_commit). Inside a
+batch(), which wraps every request through ChangeEventBatchMiddleware and
+any bulk operation that opts in, events are coalesced: subscribers receive
+one event per (model, action) carrying the union of primary keys, however
+many rows were touched.
+
+Subscribers register with ``subscribe``. Synchronous handlers run inline
+after commit. Queued handlers run on a background worker thread, so slow
+work (search indexing, feed rebuilds) never holds up the request.
+"""
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+SAVED = 'saved'
+DELETED = 'deleted'
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    model: str  # model label, e.g. "products.Product"
+    action: str  # SAVED or DELETED
+    pks: frozenset
+
+
+@dataclass(frozen=True)
+class Subscription:
+    handler: object
+    models: frozenset | None
+    queued: bool
+
+    def wants(self, event):
+        return self.models is None or event.model in self.models
+
+
+_subscriptions = []
+_current_batch = ContextVar('change_event_batch', default=None)
+
+
+def _label(model):
+    return model if isinstance(model, str) else model._meta.label
+
+
+def subscribe(handler=None, *, models=None, queued=False):
+    """Register handler(events) for changes to ``models`` (labels or classes; None = all).
+
+    Usable as a plain call or as a decorator.
+    """
+    def register(func):
+        labels = frozenset(_label(model) for model in models) if models else None
+        subscription = Subscription(func, labels, queued)
+        if subscription not in _subscriptions:
+            _subscriptions.append(subscription)
+        return func
+
+    if handler is None:
+        return register
+    return register(handler)
+
+
+def unsubscribe(handler):
+    _subscriptions[:] = [sub for sub in _subscriptions if sub.handler is not handler]
+
+
+class _Batch:
+    def __init__(self):
+        self.pending = {}
+        self.closed = False
+
+    def add(self, label, action, pks):
+        if self.closed:
+            # transaction committed after the batch ended - deliver straight away
+            dispatch([ChangeEvent(label, action, frozenset(pks))])
+            return
+        self.pending.setdefault((label, action), set()).update(pks)
+
+    def events(self):
+        return [
+            ChangeEvent(label, action, frozenset(pks))
+            for (label, action), pks in self.pending.items()
+        ]
+
+
+@contextmanager
+def batch():
+    """Coalesce every event published inside the block into one notification per model/action"""
+    if _current_batch.get() is not None:
+        # nested batches fold into the outermost one
+        yield
+        return
+    current = _Batch()
+    token = _current_batch.set(current)
+    try:
+        yield
+    finally:
+        _current_batch.reset(token)
+        current.closed = True
+        dispatch(current.events())
+
+
+def publish(model, pks, action=SAVED, using=None):
+    """Announce that rows of ``model`` changed; delivered once the transaction commits"""
+    pks = set(pks)
+    if not pks:
+        return
+    label = _label(model)
+    current = _current_batch.get()
+    if current is not None:
+        transaction.on_commit(lambda: current.add(label, action, pks), using=using)
+    else:
+        transaction.on_commit(lambda: dispatch([ChangeEvent(label, action, frozenset(pks))]), using=using)
+
+
+def dispatch(events):
+    if not events:
+        return
+    for subscription in list(_subscriptions):
+        wanted = [event for event in events if subscription.wants(event)]
+        if not wanted:
+            continue
+        if subscription.queued:
+            _worker().put((subscription.handler, wanted))
+        else:
+            _run(subscription.handler, wanted)
+
+
+def _run(handler, events):
+    try:
+        handler(events)
+    except Exception:
+        logger.exception('Change event handler %r failed', handler)
+
+
+class _QueueWorker:
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._loop, name='change-events', daemon=True)
+        self.thread.start()
+
+    def put(self, item):
+        self.queue.put(item)
+
+    def _loop(self):
+        from django.db import close_old_connections
+        while True:
+            handler, events = self.queue.get()
+            _run(handler, events)
+            close_old_connections()
+            self.queue.task_done()
+
+
+_worker_instance = None
+_worker_lock = threading.Lock()
+
+
+def _worker():
+    global _worker_instance
+    if _worker_instance is None:
+        with _worker_lock:
+            if _worker_instance is None:
+                _worker_instance = _QueueWorker()
+    return _worker_instance
+
+
+def wait_for_queued_handlers():
+    """Block until the background worker has drained its queue (tests, management commands)"""
+    if _worker_instance is not None:
+        _worker_instance.queue.join()
@@ -0,0 +1,73 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import format_summary, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        'fires concurrent requests at running server(s) and reports requests/sec and latency percentiles. '
+        'e.g. compare `uvicorn tradehub.asgi:application` (ASYNC_CATALOG_VIEWS=true) with '
+        '`gunicorn tradehub.wsgi` by passing both base urls'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_urls', nargs='+', help='server roots, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--path', action='append', dest='paths', help='path to hit (repeatable), default /products/')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--seconds', type=float, default=10.0)
+        parser.add_argument('--header', action='append', default=[], help='extra header "Name: value" (repeatable)')
+        parser.add_argument('--method', default='GET')
+        parser.add_argument('--data', default=None, help='request body (sent as application/json)')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or ['/products/']
+        headers = {}
+        for header in options['header']:
+            name, _, value = header.partition(':')
+            headers[name.strip()] = value.strip()
+        if options['data'] is not None:
+            headers.setdefault('Content-Type', 'application/json')
+
+        for base_url in options['base_urls']:
+            latencies, errors = self._run(base_url.rstrip('/'), paths, headers, options)
+            self.stdout.write(format_summary(base_url, summarize(latencies, options['seconds'])) + f'  errors {errors}')
+
+    def _run(self, base_url, paths, headers, options):
+        deadline = time.perf_counter() + options['seconds']
+        body = options['data'].encode() if options['data'] is not None else None
+        latencies = []
+        errors = [0]
+        lock = threading.Lock()
+
+        def worker(offset):
+            local = []
+            failed = 0
+            count = offset
+            while time.perf_counter() < deadline:
+                url = base_url + paths[count % len(paths)]
+                count += 1
+                request = urllib.request.Request(url, data=body, headers=headers, method=options['method'])
+                start = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(request, timeout=30) as response:
+                        response.read()
+                    local.append(time.perf_counter() - start)
+                except (urllib.error.URLError, OSError):
+                    failed += 1
+            with lock:
+                latencies.extend(local)
+                errors[0] += failed
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if not latencies and errors[0]:
+            raise CommandError(f'Every request to {base_url} failed - is the server running?')
+        return latencies, errors[0]
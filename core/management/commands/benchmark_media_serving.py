@@ -0,0 +1,93 @@
+import os
+import random
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.views.static import serve
+
+from core.benchmark import Stopwatch
+from core.media import serve_media
+
+
+def drain(response):
+    """Consume a response the way a WSGI server without file_wrapper would"""
+    sent = sum(len(chunk) for chunk in response.streaming_content) if response.streaming else len(response.content)
+    response.close()
+    return sent
+
+
+def drain_sendfile(response, sink):
+    """Consume a response the way gunicorn's file_wrapper does: os.sendfile() when the file has a fileno"""
+    source = response.file_to_stream
+    if not hasattr(source, 'fileno'):
+        return drain(response)
+    size = os.fstat(source.fileno()).st_size
+    offset = 0
+    while offset < size:
+        sent = os.sendfile(sink, source.fileno(), offset, size - offset)
+        if not sent:
+            break
+        offset += sent
+    response.close()
+    return offset
+
+
+class Command(BaseCommand):
+    help = (
+        'measures media serving throughput in-process: django.views.static.serve (the DEBUG path) '
+        'against core.media.serve_media drained in python, through sendfile, with Range requests and '
+        'with X-Accel-Redirect offload. files are generated in a temporary directory'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='64,1024,16384', help='file sizes in KiB, comma separated')
+        parser.add_argument('--requests', type=int, default=50, help='requests per mode and size')
+        parser.add_argument('--range-kib', type=int, default=256, help='size of each Range request')
+
+    def handle(self, *args, **options):
+        root = tempfile.mkdtemp(prefix='media-benchmark-')
+        factory = RequestFactory()
+        sink = os.open(os.devnull, os.O_WRONLY)
+        try:
+            for kib in [int(size) for size in options['sizes'].split(',')]:
+                name = f'bench-{kib}.bin'
+                with open(os.path.join(root, name), 'wb') as file:
+                    file.write(os.urandom(kib * 1024))
+                self.stdout.write(f'{kib} KiB file, {options["requests"]} requests per mode')
+                range_bytes = min(kib, options['range_kib']) * 1024
+
+                def ranged():
+                    start = random.randrange(0, kib * 1024 - range_bytes + 1)
+                    return factory.get('/', HTTP_RANGE=f'bytes={start}-{start + range_bytes - 1}')
+
+                modes = [
+                    ('static.serve (before)', lambda: drain(serve(factory.get('/'), name, document_root=root))),
+                    ('static.serve + Range', lambda: drain(serve(ranged(), name, document_root=root))),
+                    ('serve_media', lambda: drain(serve_media(factory.get('/'), name, document_root=root))),
+                    ('serve_media + sendfile', lambda: drain_sendfile(
+                        serve_media(factory.get('/'), name, document_root=root), sink)),
+                    ('serve_media + Range', lambda: drain(serve_media(ranged(), name, document_root=root))),
+                    ('serve_media + 304', lambda: drain(serve_media(
+                        factory.get('/', HTTP_IF_NONE_MATCH=serve_media(factory.get('/'), name, document_root=root)['ETag']),
+                        name, document_root=root))),
+                ]
+                for label, run in modes:
+                    self._report(label, run, options['requests'])
+                with override_settings(MEDIA_SENDFILE='x-accel-redirect'):
+                    self._report('X-Accel-Redirect', lambda: drain(
+                        serve_media(factory.get('/'), name, document_root=root)), options['requests'])
+        finally:
+            os.close(sink)
+            shutil.rmtree(root, ignore_errors=True)
+
+    def _report(self, label, run, requests):
+        sent = 0
+        with Stopwatch() as watch:
+            for _ in range(requests):
+                sent += run()
+        self.stdout.write(
+            f'  {label:<24} {requests / watch.elapsed:>9.1f} req/s  {sent / watch.elapsed / 1024 / 1024:>9.1f} MiB/s  '
+            f'{sent / requests / 1024:>9.1f} KiB/request'
+        )
@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.benchmark import format_summary, summarize
+
+
+class Command(BaseCommand):
+    help = 'compares mixed read/write throughput on sqlite with and without the performance profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--rows', type=int, default=20000, help='rows seeded before the run')
+
+    def handle(self, *args, **options):
+        profiles = {
+            'default (rollback journal)': {'pragmas': {}, 'immediate': False},
+            'performance profile (WAL)': {'pragmas': settings.SQLITE_PRAGMAS, 'immediate': True},
+        }
+        for label, profile in profiles.items():
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'bench.sqlite3')
+                self._seed(path, options['rows'])
+                reads, writes, locked = self._run(path, profile, options)
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write('  ' + format_summary('reads', reads))
+            self.stdout.write('  ' + format_summary('writes', writes))
+            self.stdout.write(f'  "database is locked" errors: {locked}')
+
+    def _seed(self, path, rows):
+        db = sqlite3.connect(path)
+        db.execute('CREATE TABLE review (id INTEGER PRIMARY KEY, product_id INTEGER, rating INTEGER, comment TEXT)')
+        db.execute('CREATE INDEX review_product ON review(product_id)')
+        db.executemany(
+            'INSERT INTO review (product_id, rating, comment) VALUES (?, ?, ?)',
+            ((i % 500, i % 5 + 1, 'seed review text ' * 4) for i in range(rows)),
+        )
+        db.commit()
+        db.close()
+
+    def _connect(self, path, profile):
+        db = sqlite3.connect(path, timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000, isolation_level=None, check_same_thread=False)
+        for pragma, value in profile['pragmas'].items():
+            db.execute(f'PRAGMA {pragma}={value}')
+        return db
+
+    def _run(self, path, profile, options):
+        deadline = time.perf_counter() + options['seconds']
+        read_latencies, write_latencies = [], []
+        locked = [0]
+        lock = threading.Lock()
+
+        def reader(worker):
+            db = self._connect(path, profile)
+            local = []
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    db.execute('SELECT COUNT(*), AVG(rating) FROM review WHERE product_id = ?', (worker * 7 % 500,)).fetchone()
+                    local.append(time.perf_counter() - start)
+                except sqlite3.OperationalError:
+                    with lock:
+                        locked[0] += 1
+            with lock:
+                read_latencies.extend(local)
+            db.close()
+
+        def writer(worker):
+            db = self._connect(path, profile)
+            begin = 'BEGIN IMMEDIATE' if profile['immediate'] else 'BEGIN'
+            local = []
+            counter = 0
+            while time.perf_counter() < deadline:
+                counter += 1
+                start = time.perf_counter()
+                try:
+                    db.execute(begin)
+                    db.execute('SELECT COUNT(*) FROM review WHERE product_id = ?', (counter % 500,)).fetchone()
+                    db.execute(
+                        'INSERT INTO review (product_id, rating, comment) VALUES (?, ?, ?)',
+                        (counter % 500, counter % 5 + 1, f'worker {worker} review'),
+                    )
+                    db.execute('UPDATE review SET rating = ? WHERE id = ?', (counter % 5 + 1, counter))
+                    db.execute('COMMIT')
+                    local.append(time.perf_counter() - start)
+                except sqlite3.OperationalError:
+                    if db.in_transaction:
+                        db.execute('ROLLBACK')
+                    with lock:
+                        locked[0] += 1
+            with lock:
+                write_latencies.extend(local)
+            db.close()
+
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(options['readers'])]
+        threads += [threading.Thread(target=writer, args=(i,)) for i in range(options['writers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        return summarize(read_latencies, elapsed), summarize(write_latencies, elapsed), locked[0]
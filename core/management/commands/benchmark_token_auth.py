@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from core.authentication import CachedTokenAuthentication, token_cache
+from core.benchmark import Stopwatch, format_summary, summarize
+from vendors.models import Vendor
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def push_call(authenticator, request):
+    """authenticate the way an inventory push does, then run its vendor permission check"""
+    user, _ = authenticator.authenticate(request)
+    return hasattr(user, 'vendor') and user.vendor.pk
+
+
+class Command(BaseCommand):
+    help = (
+        'measures API calls/sec for an automated vendor pushing inventory, authenticating with plain '
+        'TokenAuthentication vs CachedTokenAuthentication. for an end-to-end run against a live server use '
+        'benchmark_http --header "Authorization: Token <key>" --method POST --data ... --path /api/v1/...'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendor', type=int, help='vendor id (defaults to the first vendor)')
+        parser.add_argument('--calls', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        vendors = Vendor.objects.select_related('user')
+        vendor = vendors.filter(pk=options['vendor']).first() if options['vendor'] else vendors.first()
+        if vendor is None:
+            raise CommandError('No vendor to benchmark with.')
+        token, _ = Token.objects.get_or_create(user=vendor.user)
+        request = APIRequestFactory().post(
+            '/api/v1/products/', {}, format='json', HTTP_AUTHORIZATION=f'Token {token.key}'
+        )
+
+        token_cache.clear()
+        self.stdout.write(f'vendor {vendor.store_name!r}, {options["calls"]} calls each')
+        for label, authenticator in (
+            ('token auth', TokenAuthentication()),
+            ('cached token auth', CachedTokenAuthentication()),
+        ):
+            latencies = []
+            queries = QueryCounter()
+            with connection.execute_wrapper(queries), Stopwatch() as watch:
+                for _ in range(options['calls']):
+                    start = time.perf_counter()
+                    push_call(authenticator, request)
+                    latencies.append(time.perf_counter() - start)
+            self.stdout.write(
+                format_summary(label, summarize(latencies, watch.elapsed))
+                + f'  queries {queries.count}'
+            )
@@ -0,0 +1,71 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.conf import settings
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from core.benchmark import Stopwatch
+
+
+class Command(BaseCommand):
+    help = (
+        'renders every admin changelist that declares a query_budget (plus any filtered --url) as a superuser '
+        'and fails when a page runs more queries than its budget'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', default=None, help='superuser to render as (default: the first one)')
+        parser.add_argument('--host', default='localhost', help='Host header for the requests')
+        parser.add_argument('--url', action='append', dest='urls', default=[],
+                            help='extra changelist url with filters, checked against its model budget (repeatable)')
+        parser.add_argument('--verbose-queries', action='store_true', help='print the SQL of every page')
+
+    def handle(self, *args, **options):
+        users = get_user_model()._default_manager.filter(is_superuser=True, is_active=True)
+        if options['username']:
+            users = users.filter(username=options['username'])
+        user = users.order_by('pk').first()
+        if user is None:
+            raise CommandError('No active superuser to render the admin as; create one or pass --username.')
+        client = Client(HTTP_HOST=options['host'])
+        client.force_login(user)
+
+        pages = []
+        budgets = {}
+        for model, model_admin in admin.site._registry.items():
+            budget = getattr(model_admin, 'query_budget', None)
+            if budget is None:
+                continue
+            url = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+            budgets[url] = budget
+            pages.append((url, budget))
+        for url in options['urls']:
+            path = url.split('?')[0]
+            if path not in budgets:
+                raise CommandError(f'{path} is not a changelist with a query_budget')
+            pages.append((url, budgets[path]))
+
+        # {% static %} needs no query; plain storage keeps installs without collectstatic working
+        plain_static = override_settings(STORAGES={
+            **settings.STORAGES,
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        })
+        failures = 0
+        for url, budget in pages:
+            with plain_static, CaptureQueriesContext(connections['default']) as queries, Stopwatch() as timer:
+                response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{url} returned {response.status_code}')
+            over = len(queries) > budget
+            failures += over
+            line = f'{url:<48} {len(queries):>3} queries (budget {budget})  {timer.elapsed * 1000:>8.1f}ms'
+            self.stdout.write(self.style.ERROR(line) if over else line)
+            if options['verbose_queries'] or over:
+                for query in queries:
+                    self.stdout.write(f"    {query['sql'][:200]}")
+        if failures:
+            raise CommandError(f'{failures} changelist(s) over their query budget')
+        self.stdout.write(self.style.SUCCESS(f'{len(pages)} changelist(s) within their query budget'))
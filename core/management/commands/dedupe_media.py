@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, CharField, F, Value, When
+
+from core.storage import (
+    BLOB_PREFIX, HASH_CHUNK_SIZE, MEDIA_FIELDS, ContentAddressedStorage, blob_name, collect_garbage,
+    content_digest, record_blob, recount_references,
+)
+
+UPDATE_BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'moves the existing media tree into content-addressed blobs: hashes the files referenced by '
+        'product images, category images and vendor logos in parallel, points the rows at one blob per '
+        'distinct content and removes the originals. --gc also deletes long-unreferenced blobs'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=min(8, os.cpu_count() or 1))
+        parser.add_argument('--dry-run', action='store_true', help='only hash and report the savings')
+        parser.add_argument('--keep-originals', action='store_true', help='leave the old files in place')
+        parser.add_argument('--gc', action='store_true', help='delete blobs unreferenced for --grace-hours')
+        parser.add_argument('--grace-hours', type=float, default=1)
+
+    def handle(self, *args, **options):
+        storage = default_storage
+        if not isinstance(storage, ContentAddressedStorage):
+            raise CommandError('The default storage is not core.storage.ContentAddressedStorage.')
+        self.storage = storage
+        self.dry_run = options['dry_run']
+
+        legacy = self._legacy_names()
+        self.stdout.write(f'{len(legacy)} referenced files outside {BLOB_PREFIX}, hashing with {options["workers"]} workers')
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            results = [result for result in pool.map(self._ingest, sorted(legacy)) if result]
+        missing = len(legacy) - len(results)
+
+        original_bytes = sum(size for _, _, _, size in results)
+        unique = {blob: size for _, blob, _, size in results}
+        self.stdout.write(
+            f'{len(results)} files ({original_bytes / 1024 / 1024:.1f} MiB) -> {len(unique)} blobs '
+            f'({sum(unique.values()) / 1024 / 1024:.1f} MiB); {missing} referenced files missing on disk'
+        )
+        if not self.dry_run and results:
+            mapping = {name: blob for name, blob, _, _ in results}
+            with transaction.atomic():
+                for _, blob, digest, size in results:
+                    record_blob(blob, digest, size)
+                updated = self._repoint(mapping)
+                referenced = recount_references()
+            self.stdout.write(f'{updated} rows now point at blobs; {referenced} blobs referenced')
+            if not options['keep_originals']:
+                for name in mapping:
+                    self.storage.delete(name)
+
+        if options['gc']:
+            removed, freed = collect_garbage(
+                self.storage, timedelta(hours=options['grace_hours']), dry_run=self.dry_run,
+            )
+            self.stdout.write(f'{removed} unreferenced blobs ({freed / 1024 / 1024:.1f} MiB) collected')
+        self.stdout.write(self.style.SUCCESS('Dry run finished.' if self.dry_run else 'Media deduplicated.'))
+
+    def _legacy_names(self):
+        names = set()
+        for label, field in MEDIA_FIELDS:
+            names.update(
+                apps.get_model(label)._base_manager
+                .exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                .exclude(**{f'{field}__startswith': BLOB_PREFIX})
+                .values_list(field, flat=True).distinct()
+            )
+        return names
+
+    def _ingest(self, name):
+        """Worker: hash (and unless dry-running, store) one file - no database access here"""
+        path = self.storage.path(name)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as source:
+            chunks = iter(lambda: source.read(HASH_CHUNK_SIZE), b'')
+            if self.dry_run:
+                digest, size = content_digest(chunks)
+                return name, blob_name(digest, name), digest, size
+            blob, digest, size = self.storage.ingest(chunks, name)
+        return name, blob, digest, size
+
+    def _repoint(self, mapping):
+        updated = 0
+        names = list(mapping)
+        for label, field in MEDIA_FIELDS:
+            manager = apps.get_model(label)._base_manager
+            for start in range(0, len(names), UPDATE_BATCH_SIZE):
+                batch = names[start:start + UPDATE_BATCH_SIZE]
+                updated += manager.filter(**{f'{field}__in': batch}).update(**{field: Case(
+                    *[When(**{field: name}, then=Value(mapping[name])) for name in batch],
+                    default=F(field),
+                    output_field=CharField(),
+                )})
+        return updated
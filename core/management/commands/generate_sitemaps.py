@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.sitemaps import generate, sitemap_root
+
+
+class Command(BaseCommand):
+    help = (
+        'writes gzipped sitemap shards (products, vendors, categories) and the product feed '
+        '(NDJSON and XML) into SITEMAP_ROOT, rewriting only shards changed since the last run'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='ignore the manifest and rewrite every shard')
+        parser.add_argument('--root', help='output directory (default: SITEMAP_ROOT)')
+
+    def handle(self, *args, **options):
+        root = options['root'] or sitemap_root()
+        stats = generate(full=options['full'], root=root, log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f"Sitemaps in {root}: {stats['written']} shards written, {stats['skipped']} unchanged, "
+            f"{stats['removed']} removed, {stats['entries']} entries"
+        ))
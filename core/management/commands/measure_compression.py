@@ -0,0 +1,74 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from core.compression import VARIANT_SUFFIXES, available_encodings, is_compressible
+
+
+def kib(size):
+    return f'{size / 1024:>10.1f} KiB'
+
+
+class Command(BaseCommand):
+    help = (
+        'reports bytes saved by compression: the precompressed variants collectstatic wrote into '
+        'STATIC_ROOT, and for each --path the size of the page sent as identity, gzip and (if installed) brotli'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append', dest='paths', default=[],
+                            help='dynamic page to fetch through the middleware (repeatable), e.g. /products/')
+        parser.add_argument('--host', default='localhost', help='Host header for --path requests')
+        parser.add_argument('--static-root', default=None)
+
+    def handle(self, *args, **options):
+        self._static(options['static_root'] or settings.STATIC_ROOT)
+        if options['paths']:
+            self._dynamic(options['paths'], options['host'])
+
+    def _static(self, root):
+        if not root or not os.path.isdir(root):
+            self.stdout.write(f'No collected static files in {root}; run collectstatic first.')
+            return
+        files = 0
+        original = 0
+        best = {encoding: 0 for encoding in VARIANT_SUFFIXES}
+        variants = {encoding: 0 for encoding in VARIANT_SUFFIXES}
+        for directory, _, names in os.walk(root):
+            for name in names:
+                if not is_compressible(name):
+                    continue
+                path = os.path.join(directory, name)
+                size = os.path.getsize(path)
+                files += 1
+                original += size
+                for encoding, suffix in VARIANT_SUFFIXES.items():
+                    variant = path + suffix
+                    if os.path.exists(variant):
+                        best[encoding] += os.path.getsize(variant)
+                        variants[encoding] += 1
+                    else:
+                        best[encoding] += size
+        self.stdout.write(f'Static ({root}): {files} compressible files, {kib(original)} uncompressed')
+        for encoding, size in best.items():
+            if not variants[encoding]:
+                continue
+            saved = 1 - size / original if original else 0
+            self.stdout.write(f'  {encoding:<8} {kib(size)}  saves {saved:>6.1%}  ({variants[encoding]} variants)')
+
+    def _dynamic(self, paths, host):
+        client = Client(HTTP_HOST=host)
+        encodings = ['identity', *available_encodings()]
+        self.stdout.write('Dynamic responses: ' + '  '.join(f'{encoding:>14}' for encoding in encodings))
+        for path in paths:
+            sizes = []
+            for encoding in encodings:
+                response = client.get(path, HTTP_ACCEPT_ENCODING=encoding)
+                body = b''.join(response.streaming_content) if response.streaming else response.content
+                sizes.append(len(body))
+            saved = 1 - min(sizes) / sizes[0] if sizes[0] else 0
+            self.stdout.write(
+                f'  {path:<16} ' + '  '.join(kib(size) for size in sizes) + f'  saves {saved:.1%}'
+            )
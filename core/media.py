@@ -0,0 +1,217 @@
+"""
+Serving uploaded media.
+
+django.views.static.serve is a development helper. It has no ETag, no Range
+support (so video seeking and resumed downloads refetch the whole file),
+and no way to hand the transfer to the front server. serve_media() is the
+production path for MEDIA_URL:
+
+- It answers conditional requests (If-None-Match, If-Modified-Since and
+  friends) from an ETag and Last-Modified taken from the file's stat.
+- A single Range ("bytes=a-b", "bytes=a-", "bytes=-n") gets a 206 with
+  Content-Range, and If-Range is honoured. An unsatisfiable range gets a
+  416. Multi-range requests get the whole file, which RFC 9110 allows.
+- Whole files go out as a FileResponse around the open file. A WSGI server
+  with wsgi.file_wrapper (gunicorn, uWSGI) then sends them with
+  os.sendfile() without copying through Python. Ranges stream through a
+  bounded reader.
+- With MEDIA_SENDFILE = 'x-accel-redirect' (nginx) or 'x-sendfile'
+  (Apache/lighttpd), Django only checks the request and sets headers, and
+  the front server transfers the bytes, ranges included.
+
+Blob files from core.storage.ContentAddressedStorage never change content
+under the same name, so they are sent with a one-year immutable
+Cache-Control. Other media get MEDIA_CACHE_MAX_AGE.
+
+serve_static() applies the same machinery to STATIC_ROOT. It picks the .br
+or .gz variant written by core.staticfiles when the client accepts it, and
+marks hashed names immutable.
+"""
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+from .compression import VARIANT_SUFFIXES, accepted_encodings, is_compressible
+from .storage import IMMUTABLE_CACHE_CONTROL, is_blob
+
+STREAM_BLOCK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# a stored .gz/.tgz is an archive the client downloads, not a transfer encoding to undo
+ARCHIVE_TYPES = {'bzip2': 'application/x-bzip', 'gzip': 'application/gzip', 'xz': 'application/x-xz'}
+# names written by ManifestStaticFilesStorage: name.<12 hex digits>.ext
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+
+
+class RangeFile:
+    """Read-only view of ``length`` bytes of an open file starting at ``start``"""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single satisfiable byte range, None to serve everything, or 'invalid'"""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        # malformed or multi-range: ignore the header and send the whole file
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return 'invalid'
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return 'invalid'
+    return start, min(end, size - 1)
+
+
+def _range_applies(request, etag, last_modified):
+    """If-Range: only honour Range when the client's copy is still current"""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _cache_headers(response, etag, last_modified, cache_control, vary=False):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = cache_control
+    response['Accept-Ranges'] = 'bytes'
+    if vary:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def _offload(backend, path, fullpath, content_type):
+    response = HttpResponse(content_type=content_type)
+    if backend == 'x-accel-redirect':
+        prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + path
+    else:
+        response['X-Sendfile'] = fullpath
+    return response
+
+
+def resolve(document_root, path):
+    """(absolute path, stat) of a regular file under ``document_root``; Http404 otherwise"""
+    try:
+        fullpath = safe_join(document_root, path)
+    except (SuspiciousFileOperation, ValueError):
+        raise Http404('Invalid file path')
+    try:
+        info = os.stat(fullpath)
+    except OSError:
+        raise Http404('File not found')
+    if not stat.S_ISREG(info.st_mode):
+        raise Http404('File not found')
+    return fullpath, info
+
+
+def serve_file(request, fullpath, info, cache_control, content_type=None, content_encoding=None,
+               offload=None, vary=False):
+    """Conditional, Range-aware response for one file on disk"""
+    size = info.st_size
+    last_modified = int(info.st_mtime)
+    etag = f'"{info.st_mtime_ns:x}-{size:x}"'
+
+    def finish(response):
+        return _cache_headers(response, etag, last_modified, cache_control, vary)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return finish(response)
+
+    if not content_type:
+        guessed_type, archive = mimetypes.guess_type(fullpath)
+        content_type = ARCHIVE_TYPES.get(archive, guessed_type)
+    content_type = content_type or 'application/octet-stream'
+    if offload:
+        return finish(offload(content_type))
+
+    byte_range = None
+    if 'Range' in request.headers and _range_applies(request, etag, last_modified):
+        byte_range = parse_range(request.headers['Range'], size)
+    if byte_range == 'invalid':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return finish(response)
+
+    file = open(fullpath, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFile(file, start, end - start + 1), content_type=content_type, status=206)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    response.block_size = STREAM_BLOCK_SIZE
+    if content_encoding:
+        response['Content-Encoding'] = content_encoding
+    return finish(response)
+
+
+def serve_media(request, path, document_root=None):
+    fullpath, info = resolve(document_root or settings.MEDIA_ROOT, path)
+    if is_blob(path):
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        cache_control = f"public, max-age={getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600)}"
+    backend = getattr(settings, 'MEDIA_SENDFILE', '')
+    offload = (lambda content_type: _offload(backend, path, fullpath, content_type)) if backend else None
+    return serve_file(request, fullpath, info, cache_control, offload=offload)
+
+
+def serve_static(request, path, document_root=None):
+    """Collected static files, choosing a precompressed .br/.gz variant the client accepts"""
+    document_root = document_root or settings.STATIC_ROOT
+    fullpath, info = resolve(document_root, path)
+    if HASHED_NAME_RE.search(path):
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        cache_control = f"public, max-age={getattr(settings, 'STATIC_CACHE_MAX_AGE', 300)}"
+    if not is_compressible(path):
+        return serve_file(request, fullpath, info, cache_control)
+
+    content_type = mimetypes.guess_type(fullpath)[0]
+    for encoding in accepted_encodings(request.headers.get('Accept-Encoding', '')):
+        variant = fullpath + VARIANT_SUFFIXES[encoding]
+        try:
+            variant_info = os.stat(variant)
+        except OSError:
+            continue
+        return serve_file(
+            request, variant, variant_info, cache_control,
+            content_type=content_type, content_encoding=encoding, vary=True,
+        )
+    return serve_file(request, fullpath, info, cache_control, vary=True)
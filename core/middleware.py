@@ -0,0 +1,148 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+
+from . import compression, events
+from .cache import is_shared
+from .db_router import _read_from_replica, replica_aliases
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_COOKIE = 'tradehub_pin_primary'
+
+
+class ReplicaRoutingMiddleware:
+    """Send reads for replica-safe views to a read replica.
+
+    A client that just made a write gets a short-lived cookie that keeps its
+    reads on the primary, so it always sees its own changes even when the
+    replicas are lagging. API clients sending a token usually drop cookies,
+    so writes by a token or a logged-in user also set a pin key with the same
+    lifetime in REPLICA_PIN_CACHE. The pin has to be seen by every worker. If
+    that cache is per-process memory, token clients and logged-in users
+    always read from the primary instead.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+        self.cache = caches[getattr(settings, 'REPLICA_PIN_CACHE', 'default')]
+        self.shared = is_shared(self.cache)
+
+    def __call__(self, request):
+        request._replica_token = None
+        try:
+            response = self.get_response(request)
+        finally:
+            if request._replica_token is not None:
+                _read_from_replica.reset(request._replica_token)
+        if request.method not in SAFE_METHODS and replica_aliases():
+            response.set_cookie(PIN_COOKIE, '1', max_age=self.pin_seconds, httponly=True, samesite='Lax')
+            keys = self._pin_keys(request) if self.shared else None
+            if keys:
+                self.cache.set_many(dict.fromkeys(keys, 1), self.pin_seconds)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES:
+            return None
+        if not self._is_replica_safe(request, view_func):
+            return None
+        keys = self._pin_keys(request)
+        # a local pin cache can't tell us about writes handled by other workers
+        if keys and (not self.shared or self.cache.get_many(keys)):
+            return None
+        request._replica_token = _read_from_replica.set(True)
+        return None
+
+    @staticmethod
+    def _pin_keys(request):
+        """Cache keys that identify the client across requests: its token and/or its user"""
+        keys = []
+        authorization = request.META.get('HTTP_AUTHORIZATION')
+        if authorization:
+            # token requests are only authenticated inside the view, so key on the header itself
+            keys.append('replica-pin:auth:' + hashlib.sha256(authorization.encode()).hexdigest())
+        # DRF copies the user it authenticated back onto the Django request
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            keys.append(f'replica-pin:user:{user.pk}')
+        return keys
+
+    @staticmethod
+    def _is_replica_safe(request, view_func):
+        view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+        if getattr(view_class, 'use_read_replica', False):
+            return True
+        # DRF viewsets expose their method -> action map on the view function
+        actions = getattr(view_func, 'actions', None) or {}
+        return actions.get(request.method.lower()) == 'list'
+
+
+class ChangeEventBatchMiddleware:
+    """Coalesce every catalog change event raised while handling a request.
+
+    Subscribers are notified once, after the response has been produced,
+    with one event per model and action instead of one per saved row.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with events.batch():
+            return self.get_response(request)
+
+
+class CompressionMiddleware:
+    """Compress HTML, JSON and other text responses for clients that accept it.
+
+    Uses brotli when the package is installed and the client accepts it, gzip
+    otherwise (see core.compression). Responses smaller than
+    COMPRESSION_MIN_BYTES go out as they are, because the framing costs more
+    than it saves. Streaming responses are compressed chunk by chunk and keep
+    streaming. File responses are left alone: static files are precompressed
+    and media are mostly already-compressed images.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_bytes = getattr(settings, 'COMPRESSION_MIN_BYTES', 1024)
+        self.encodings = compression.available_encodings()
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.has_header('Content-Encoding')
+            or getattr(response, 'file_to_stream', None) is not None
+            or response.status_code == 206
+            or not compression.is_compressible_type(response.get('Content-Type'))
+            or (not response.streaming and len(response.content) < self.min_bytes)
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = compression.accepted_encodings(request.headers.get('Accept-Encoding', ''), self.encodings)
+        if not accepted:
+            return response
+        encoding = accepted[0]
+
+        if response.streaming:
+            if response.is_async:
+                # compress_stream() is synchronous; leave async streams uncompressed
+                return response
+            response.streaming_content = compression.compress_stream(response.streaming_content, encoding)
+            del response.headers['Content-Length']
+        else:
+            compressed = compression.compress(response.content, encoding, dynamic=True)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import storage as media_storage
+from .authentication import token_cache
+from .context_processors import touch_cart
+
+
+@receiver(post_save, sender='orders.CartItem')
+@receiver(post_delete, sender='orders.CartItem')
+def cart_item_changed(sender, instance, **kwargs):
+    touch_cart(instance.cart_id)
+
+
+@receiver(post_save, sender='authtoken.Token')
+@receiver(post_delete, sender='authtoken.Token')
+def token_changed(sender, instance, **kwargs):
+    token_cache.discard(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def token_user_changed(sender, instance, **kwargs):
+    token_cache.discard_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def token_user_groups_changed(sender, instance, reverse, pk_set, **kwargs):
+    if not kwargs['action'].startswith('post_'):
+        return
+    if not reverse:
+        token_cache.discard_user(instance.pk)
+    elif pk_set:
+        for user_id in pk_set:
+            token_cache.discard_user(user_id)
+    else:
+        token_cache.clear()
+
+
+@receiver(post_save, sender='vendors.Vendor')
+@receiver(post_delete, sender='vendors.Vendor')
+def token_vendor_changed(sender, instance, **kwargs):
+    token_cache.discard_user(instance.user_id)
+
+
+def _media_field(sender):
+    return dict(media_storage.MEDIA_FIELDS)[sender._meta.label]
+
+
+@receiver(pre_save, sender='products.ProductImage')
+@receiver(pre_save, sender='products.Category')
+@receiver(pre_save, sender='vendors.Vendor')
+def remember_media_file(sender, instance, **kwargs):
+    field = _media_field(sender)
+    previous = None
+    if not instance._state.adding:
+        previous = sender._base_manager.filter(pk=instance.pk).values_list(field, flat=True).first()
+    instance._previous_media_name = previous or ''
+
+
+@receiver(post_save, sender='products.ProductImage')
+@receiver(post_save, sender='products.Category')
+@receiver(post_save, sender='vendors.Vendor')
+def count_media_reference(sender, instance, **kwargs):
+    current = getattr(instance, _media_field(sender)).name or ''
+    previous = getattr(instance, '_previous_media_name', '')
+    if current != previous:
+        media_storage.acquire([current])
+        media_storage.release([previous])
+    instance._previous_media_name = current
+
+
+@receiver(post_delete, sender='products.ProductImage')
+@receiver(post_delete, sender='products.Category')
+@receiver(post_delete, sender='vendors.Vendor')
+def release_media_reference(sender, instance, **kwargs):
+    media_storage.release([getattr(instance, _media_field(sender)).name or ''])
@@ -0,0 +1,309 @@
+"""
+Sharded XML sitemaps and a product feed, written as static gzip files.
+
+Crawlers used to discover the catalog by walking every page. This module
+writes sitemaps for products, vendors and categories, plus a product feed
+for shopping aggregators in NDJSON and XML, into SITEMAP_ROOT. In
+development they are served under SITEMAP_URL; in production the web
+server serves the directory directly.
+
+Rows are split into shards by primary key range: shard n holds the pks in
+[n * SITEMAP_SHARD_SIZE, (n + 1) * SITEMAP_SHARD_SIZE). That caps every
+file at the sitemap protocol's 50k URLs, and a shard's contents do not move
+when rows elsewhere are added or deleted. Each shard is streamed with
+.iterator() and written through gzip into a temporary file, which is then
+renamed into place.
+
+Regeneration is incremental. One grouped query reports the row count and
+latest updated_at for every shard. Only shards whose signature differs from
+the one recorded in manifest.json are rewritten. Categories have no
+updated_at and are few, so their shard is always rewritten. A product
+image change alone does not touch Product.updated_at; a periodic --full run
+picks those up.
+"""
+import gzip
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Count, F, IntegerField, Max, Value
+from django.db.models.functions import Floor
+from django.urls import reverse
+from django.utils import timezone
+
+from products.cards import primary_image_subquery
+from products.models import Category, DeletionJob, Product
+from vendors.models import Vendor
+
+ITERATOR_CHUNK_SIZE = 2000
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+MANIFEST_NAME = 'manifest.json'
+INDEX_NAME = 'sitemap.xml'
+
+PRODUCT_FEED_FIELDS = (
+    'id', 'sku', 'name', 'slug', 'short_description', 'price', 'compare_price', 'condition',
+    'stock_quantity', 'track_inventory', 'updated_at',
+)
+
+
+def shard_size():
+    return getattr(settings, 'SITEMAP_SHARD_SIZE', 50000)
+
+
+def sitemap_root():
+    return Path(getattr(settings, 'SITEMAP_ROOT', settings.BASE_DIR / 'sitemaps'))
+
+
+def public_url(path):
+    """Absolute URL for a site path or a file under SITEMAP_URL"""
+    return getattr(settings, 'SITE_URL', 'http://localhost:8000').rstrip('/') + '/' + path.lstrip('/')
+
+
+def file_url(name):
+    return public_url(getattr(settings, 'SITEMAP_URL', 'sitemaps/') + name)
+
+
+def url_pattern(viewname, kwarg):
+    """reverse() once with a marker so per-row URLs are plain string formatting"""
+    marker = 'SITEMAP-MARKER'
+    path = reverse(viewname, kwargs={kwarg: marker if kwarg == 'slug' else 0})
+    if kwarg == 'slug':
+        return public_url(path.replace(marker, '{}'))
+    return public_url(path.replace('/0/', '/{}/'))
+
+
+@dataclass
+class Section:
+    name: str
+    queryset: object
+    values: tuple
+    view: tuple  # (viewname, 'slug' or 'pk') for the page URL
+    annotations: dict = field(default_factory=dict)
+    incremental: bool = True
+    feed: bool = False
+
+    def shard_rows(self, shard):
+        size = shard_size()
+        return (
+            self.queryset.filter(pk__gte=shard * size, pk__lt=(shard + 1) * size)
+            .order_by('pk')
+            .values(*self.values, **self.annotations)
+            .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+        )
+
+    def signatures(self):
+        """{shard: 'count:latest'} from one grouped query"""
+        rows = (
+            self.queryset.order_by()
+            .annotate(shard=Floor(F('pk') / Value(shard_size()), output_field=IntegerField()))
+            .values('shard')
+            .annotate(
+                count=Count('pk'),
+                latest=Max('updated_at') if self.incremental else Max('pk'),
+            )
+        )
+        return {
+            int(row['shard']): f"{row['count']}:{row['latest'].isoformat() if isinstance(row['latest'], datetime) else row['latest']}"
+            for row in rows
+        }
+
+
+def sections():
+    return [
+        Section(
+            'products',
+            Product.objects.filter(is_active=True),
+            PRODUCT_FEED_FIELDS,
+            ('products:detail', 'slug'),
+            annotations={
+                'vendor_name': F('vendor__store_name'),
+                'category_name': F('category__name'),
+                'image': primary_image_subquery(),
+            },
+            feed=True,
+        ),
+        Section(
+            'vendors',
+            # vendors being deleted in the background already 404 on their page
+            Vendor.objects.exclude(pk__in=DeletionJob.objects.pending_ids(Vendor)),
+            ('id', 'updated_at'),
+            ('vendors:detail', 'pk'),
+        ),
+        Section(
+            'categories',
+            Category.objects.filter(is_active=True),
+            ('id', 'slug'),
+            ('products:category', 'slug'),
+            incremental=False,
+        ),
+    ]
+
+
+class AtomicGzipFile:
+    """Text gzip file written to a temporary name and renamed into place on close"""
+
+    def __init__(self, path):
+        self.path = path
+        self.temp_path = path.with_name(path.name + '.tmp')
+        self.file = gzip.open(self.temp_path, 'wt', encoding='utf-8', compresslevel=6)
+
+    def write(self, text):
+        self.file.write(text)
+
+    def close(self):
+        self.file.close()
+        os.replace(self.temp_path, self.path)
+
+
+def _sitemap_entry(loc, lastmod=None):
+    entry = f'<url><loc>{escape(loc)}</loc>'
+    if lastmod:
+        entry += f'<lastmod>{lastmod.isoformat()}</lastmod>'
+    return entry + '</url>\n'
+
+
+def _absolute_media_url(name):
+    url = default_storage.url(name)
+    return url if url.startswith(('http://', 'https://')) else public_url(url)
+
+
+def _feed_item(row, url):
+    in_stock = not row['track_inventory'] or row['stock_quantity'] > 0
+    return {
+        'id': row['sku'] or str(row['id']),
+        'title': row['name'],
+        'description': row['short_description'],
+        'link': url,
+        'image_link': _absolute_media_url(row['image']) if row['image'] else '',
+        'price': str(row['price']),
+        'sale_price': str(row['price']) if row['compare_price'] and row['compare_price'] > row['price'] else '',
+        'list_price': str(row['compare_price'] or row['price']),
+        'availability': 'in_stock' if in_stock else 'out_of_stock',
+        'stock_quantity': row['stock_quantity'] if row['track_inventory'] else None,
+        'condition': row['condition'],
+        'brand': row['vendor_name'],
+        'product_type': row['category_name'] or '',
+        'updated_at': row['updated_at'].isoformat(),
+    }
+
+
+def _feed_xml(item):
+    return '<item>' + ''.join(
+        f'<{name}>{escape(str(value))}</{name}>' for name, value in item.items() if value not in (None, '')
+    ) + '</item>\n'
+
+
+def shard_files(section, shard):
+    files = [f'sitemap-{section.name}-{shard}.xml.gz']
+    if section.feed:
+        files += [f'feed-{section.name}-{shard}.ndjson.gz', f'feed-{section.name}-{shard}.xml.gz']
+    return files
+
+
+def write_shard(section, shard, root):
+    """Stream one shard into its sitemap (and feed) files; returns (entries, latest updated_at)"""
+    names = shard_files(section, shard)
+    outputs = [AtomicGzipFile(root / name) for name in names]
+    sitemap = outputs[0]
+    sitemap.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n')
+    if section.feed:
+        ndjson, feed_xml = outputs[1:]
+        feed_xml.write('<?xml version="1.0" encoding="UTF-8"?>\n<products>\n')
+    pattern = url_pattern(*section.view)
+    url_field = 'id' if section.view[1] == 'pk' else 'slug'
+
+    count = 0
+    latest = None
+    for row in section.shard_rows(shard):
+        url = pattern.format(row[url_field])
+        lastmod = row.get('updated_at')
+        if lastmod and (latest is None or lastmod > latest):
+            latest = lastmod
+        sitemap.write(_sitemap_entry(url, lastmod))
+        if section.feed:
+            item = _feed_item(row, url)
+            ndjson.write(json.dumps(item) + '\n')
+            feed_xml.write(_feed_xml(item))
+        count += 1
+
+    sitemap.write('</urlset>\n')
+    if section.feed:
+        feed_xml.write('</products>\n')
+    for output in outputs:
+        output.close()
+    return count, latest
+
+
+def load_manifest(root):
+    try:
+        return json.loads((root / MANIFEST_NAME).read_text())
+    except (FileNotFoundError, ValueError):
+        return {'sections': {}}
+
+
+def write_index(root, manifest):
+    """sitemap.xml listing every sitemap shard with its lastmod"""
+    path = root / INDEX_NAME
+    temp_path = path.with_name(INDEX_NAME + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as index:
+        index.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n')
+        for shards in manifest['sections'].values():
+            for shard in sorted(shards.values(), key=lambda shard: shard['files'][0]):
+                index.write(f"<sitemap><loc>{escape(file_url(shard['files'][0]))}</loc>")
+                index.write(f"<lastmod>{shard['lastmod']}</lastmod></sitemap>\n")
+        index.write('</sitemapindex>\n')
+    os.replace(temp_path, path)
+
+
+def generate(full=False, root=None, log=None):
+    """Bring SITEMAP_ROOT up to date; returns {'written': n, 'skipped': n, 'removed': n, 'entries': n}"""
+    root = Path(root) if root else sitemap_root()
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = {'sections': {}} if full else load_manifest(root)
+    previous = manifest['sections']
+    stats = {'written': 0, 'skipped': 0, 'removed': 0, 'entries': 0}
+    now = timezone.now().isoformat()
+
+    current = {}
+    for section in sections():
+        old = previous.get(section.name, {})
+        shards = current[section.name] = {}
+        for shard, signature in sorted(section.signatures().items()):
+            key = str(shard)
+            recorded = old.get(key)
+            if (
+                section.incremental and recorded and recorded['signature'] == signature
+                and all((root / name).exists() for name in recorded['files'])
+            ):
+                shards[key] = recorded
+                stats['skipped'] += 1
+                stats['entries'] += recorded['count']
+                continue
+            count, latest = write_shard(section, shard, root)
+            shards[key] = {
+                'signature': signature,
+                'count': count,
+                'files': shard_files(section, shard),
+                'lastmod': latest.isoformat() if latest else now,
+            }
+            stats['written'] += 1
+            stats['entries'] += count
+            if log:
+                log(f'{section.name} shard {shard}: {count} entries')
+        for key, recorded in old.items():
+            if key not in shards:
+                for name in recorded['files']:
+                    (root / name).unlink(missing_ok=True)
+                stats['removed'] += 1
+
+    manifest = {'generated_at': now, 'sections': current}
+    write_index(root, manifest)
+    temp_path = root / (MANIFEST_NAME + '.tmp')
+    temp_path.write_text(json.dumps(manifest, indent=1))
+    os.replace(temp_path, root / MANIFEST_NAME)
+    return stats
@@ -0,0 +1,19 @@
+"""
+SQLite performance profile.
+
+When SQLITE_PERFORMANCE_PROFILE is on, every new SQLite connection gets the
+pragmas in settings.SQLITE_PRAGMAS (WAL journal, relaxed fsync, larger page
+cache, memory-mapped reads, busy timeout) from the connection_created hook.
+Write transactions start with BEGIN IMMEDIATE through the backend's
+``transaction_mode`` option, so a writer takes the lock up front. The
+alternative is a lock upgrade that fails with "database is locked".
+"""
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not getattr(settings, 'SQLITE_PERFORMANCE_PROFILE', False):
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {pragma}={value}')
@@ -0,0 +1,33 @@
+"""
+Static files storage for collectstatic: hashed names plus precompressed variants.
+
+ManifestStaticFilesStorage gives every asset a content-hashed name
+(app.3f2a9c1b7d4e.css), so the file can be cached for a year. After hashing,
+CompressedManifestStaticFilesStorage writes name.gz (and name.br when the
+brotli package is installed) next to every compressible file, at maximum
+compression level. They are written once at deploy time instead of per
+request. core.media.serve_static serves the variant the client accepts, and
+nginx can use the same files with gzip_static/brotli_static.
+"""
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from .compression import is_compressible, write_variants
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        # the plain copies stay in STATIC_ROOT next to the hashed ones; compress both
+        names = set(paths) | set(self.hashed_files.values())
+        self.compressed = {}
+        for name in sorted(names):
+            if not is_compressible(name) or not self.exists(name):
+                continue
+            path = self.path(name)
+            variants = write_variants(path)
+            if variants:
+                self.compressed[name] = (os.path.getsize(path), variants)
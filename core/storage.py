@@ -0,0 +1,225 @@
+"""
+Content-addressed media storage.
+
+Vendors upload the same stock photos again and again. FileSystemStorage
+kept every upload as a new file, so identical bytes took up disk and page
+cache several times over and each copy had its own CDN URL.
+ContentAddressedStorage hashes an upload while streaming it to a temporary
+file. It then renames the file to
+
+    blobs/<aa>/<bb>/<sha256><ext>
+
+unless that blob already exists, in which case the temporary file is
+dropped. A blob name never changes content, so its URL is immutable and can
+be cached for a year (see core.media.serve_media).
+
+Each blob has a products.MediaBlob row counting the fields that reference
+it: ProductImage.image, Category.image and Vendor.store_logo (MEDIA_FIELDS).
+The receivers in core.signals keep the counts current on save and delete,
+and the batched cascade deleter releases the references it removes.
+Dropping to zero references does not delete the file straight away,
+because a concurrent upload of the same bytes may be about to reuse it.
+collect_garbage() removes blobs that have been unreferenced for a grace
+period. The dedupe_media command moves an existing media tree into blobs.
+
+An upload and a blob removal can race. _save() therefore bumps the blob
+row's last_used_at before it moves the file into place. A removal deletes
+the row only if it is still unreferenced and idle (a single conditional
+DELETE), and unlinks the file inside that transaction. An upload that
+arrives meanwhile waits on the row lock, then records a new row and puts
+the file back.
+"""
+import hashlib
+import os
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from pathlib import PurePosixPath
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+BLOB_PREFIX = 'blobs/'
+HASH_CHUNK_SIZE = 1024 * 1024
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# unreferenced blobs used more recently than this are left for a later collection
+GC_GRACE = timedelta(hours=1)
+
+# (model label, field name) of every file field that stores into blobs
+MEDIA_FIELDS = (
+    ('products.ProductImage', 'image'),
+    ('products.Category', 'image'),
+    ('vendors.Vendor', 'store_logo'),
+)
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_PREFIX)
+
+
+def blob_name(digest, original_name):
+    ext = PurePosixPath(original_name or '').suffix.lower()[:10]
+    return f'{BLOB_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+
+def content_digest(chunks):
+    """(sha256 hex digest, size) of a stream of byte chunks"""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in chunks:
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _blobs():
+    return apps.get_model('products', 'MediaBlob').objects
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that stores every distinct content once under its SHA-256"""
+
+    def get_available_name(self, name, max_length=None):
+        # the final name comes from the content hash in _save()
+        return name
+
+    def _spool(self, chunks):
+        """Write ``chunks`` to a temporary file; returns (temp path, sha256, size)"""
+        temp_dir = os.path.join(self.location, BLOB_PREFIX, 'tmp')
+        os.makedirs(temp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in chunks:
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    temp.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return temp_path, digest.hexdigest(), size
+
+    def _place(self, temp_path, name):
+        """Move a spooled file to its blob name, or drop it when the blob is already there"""
+        path = self.path(name)
+        if os.path.exists(path):
+            os.unlink(temp_path)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(temp_path, self.file_permissions_mode)
+        os.replace(temp_path, path)
+
+    def ingest(self, chunks, original_name):
+        """Stream ``chunks`` into the blob store; returns (blob name, sha256, size) - filesystem only"""
+        temp_path, digest, size = self._spool(chunks)
+        name = blob_name(digest, original_name)
+        try:
+            self._place(temp_path, name)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return name, digest, size
+
+    def _save(self, name, content):
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        temp_path, digest, size = self._spool(content.chunks(HASH_CHUNK_SIZE))
+        name = blob_name(digest, name)
+        try:
+            # mark the blob as in use first, so a concurrent collection cannot remove the file we rely on
+            record_blob(name, digest, size)
+            self._place(temp_path, name)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return name
+
+    def delete(self, name):
+        """Remove a file; blobs only go once nothing references them and they have been idle for GC_GRACE"""
+        if is_blob(name):
+            delete_unused(self, name, timezone.now() - GC_GRACE)
+        else:
+            super().delete(name)
+
+    def release(self, names):
+        release(names)
+
+
+def record_blob(name, digest, size):
+    """Make sure a MediaBlob row exists for a freshly stored blob and mark it as recently used"""
+    blobs = _blobs()
+    if not blobs.filter(name=name).update(last_used_at=timezone.now()):
+        blobs.get_or_create(name=name, defaults={'sha256': digest, 'size': size})
+
+
+def _adjust(names, sign):
+    counts = Counter(name for name in names if is_blob(name))
+    blobs = _blobs()
+    for name, count in counts.items():
+        blobs.filter(name=name).update(
+            ref_count=Greatest(F('ref_count') + sign * count, Value(0)),
+            last_used_at=timezone.now(),
+        )
+
+
+def acquire(names):
+    """Count one new reference per entry of ``names`` (repeat a name to count it several times)"""
+    _adjust(names, 1)
+
+
+def release(names):
+    """Drop one reference per entry of ``names``"""
+    _adjust(names, -1)
+
+
+def recount_references():
+    """Recompute every ref_count from the MEDIA_FIELDS columns; returns the number of referenced blobs"""
+    counts = Counter()
+    for label, field in MEDIA_FIELDS:
+        rows = (
+            apps.get_model(label)._base_manager
+            .filter(**{f'{field}__startswith': BLOB_PREFIX})
+            .order_by()
+            .values(field)
+            .annotate(refs=Count('pk'))
+        )
+        for row in rows:
+            counts[row[field]] += row['refs']
+    blobs = _blobs()
+    blobs.exclude(name__in=list(counts)).update(ref_count=0)
+    for name, refs in counts.items():
+        blobs.filter(name=name).exclude(ref_count=refs).update(ref_count=refs)
+    return len(counts)
+
+
+def delete_unused(storage, name, cutoff):
+    """Remove a blob's row and file if it is unreferenced and unused since ``cutoff``; True when removed"""
+    with transaction.atomic():
+        # the conditional DELETE holds the row until commit, so record_blob() for the same name waits
+        deleted, _ = _blobs().filter(name=name, ref_count=0, last_used_at__lt=cutoff).delete()
+        if deleted:
+            FileSystemStorage.delete(storage, name)
+    return bool(deleted)
+
+
+def collect_garbage(storage, grace=GC_GRACE, dry_run=False):
+    """Delete blobs unreferenced for longer than ``grace``; returns (blobs, bytes) removed"""
+    cutoff = timezone.now() - grace
+    stale = _blobs().filter(ref_count=0, last_used_at__lt=cutoff)
+    removed = freed = 0
+    for name, size in list(stale.values_list('name', 'size')):
+        if dry_run or delete_unused(storage, name, cutoff):
+            removed += 1
+            freed += size
+    return removed, freed
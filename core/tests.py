@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+from decimal import Decimal
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.cache import aget_or_compute, get_or_compute
+from products.models import Category, Product, ProductImage, Review
+from vendors.models import Vendor
+
+
+class GetOrComputeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        threads = 8
+        calls = []
+        results = []
+        lock = threading.Lock()
+        start = threading.Barrier(threads)
+
+        def compute():
+            with lock:
+                calls.append(1)
+            time.sleep(0.2)
+            return 'payload'
+
+        def worker():
+            start.wait()
+            value = get_or_compute('tests:stampede', compute, timeout=60)
+            with lock:
+                results.append(value)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['payload'] * threads)
+
+    async def test_concurrent_async_misses_compute_once(self):
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.2)
+            return 'payload'
+
+        results = await asyncio.gather(*(aget_or_compute('tests:astampede', compute, timeout=60) for _ in range(8)))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['payload'] * 8)
+
+
+# the test runner sets DEBUG=False, where the manifest storage needs a collectstatic run
+@override_settings(STORAGES={
+    **settings.STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class ChangelistQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.categories = [Category.objects.create(name=f'Category {i}', slug=f'category-{i}') for i in range(3)]
+        cls.vendors = []
+        for i in range(3):
+            user = User.objects.create_user(f'vendor{i}')
+            cls.vendors.append(Vendor.objects.create(user=user, store_name=f'Store {i}'))
+        buyers = [User.objects.create_user(f'buyer{i}') for i in range(3)]
+        for i in range(12):
+            product = Product.objects.create(
+                vendor=cls.vendors[i % 3], category=cls.categories[i % 3], name=f'Product {i}',
+                slug=f'product-{i}', description='description', price=Decimal('10.00'), stock_quantity=5,
+            )
+            ProductImage.objects.create(product=product, image=f'products/{i}.jpg')
+            Review.objects.create(user=buyers[i % 3], product=product, rating=4, comment='fine')
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def assertWithinBudget(self, model, query=''):
+        model_admin = admin.site.get_model_admin(model)
+        url = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist') + query
+        # the session and user lookups of the logged-in request count too
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), model_admin.query_budget, [query['sql'][:120] for query in queries])
+        return response
+
+    def test_product_changelist(self):
+        self.assertWithinBudget(Product)
+        vendor, category = self.vendors[0], self.categories[0]
+        response = self.assertWithinBudget(
+            Product, f'?vendor__id__exact={vendor.pk}&category__id__exact={category.pk}'
+        )
+        self.assertEqual(response.context['cl'].result_count, 4)
+
+    def test_product_image_changelist(self):
+        self.assertWithinBudget(ProductImage)
+        self.assertWithinBudget(ProductImage, f'?product__category__id__exact={self.categories[1].pk}')
+
+    def test_review_changelist(self):
+        self.assertWithinBudget(Review)
+        self.assertWithinBudget(Review, f'?product__category__id__exact={self.categories[2].pk}')
+
+    def test_vendor_changelist(self):
+        self.assertWithinBudget(Vendor)
@@ -0,0 +1,214 @@
+"""
+Token-bucket request throttling.
+
+Every client gets a bucket holding ``capacity`` tokens that refills at
+``refill_rate`` tokens per second. Each request spends the cost of the view
+it hits: 1 by default, more for expensive pages such as search, exports and
+vendor storefronts. Buckets are keyed per IP for anonymous visitors, per
+user for logged-in ones, and per API token for integrations.
+
+Bucket state lives in the configured cache (THROTTLE_CACHE) and is only
+ever changed with atomic add/incr. Spend is counted per slot: one refill
+period (capacity / refill_rate seconds) is split into THROTTLE_SLOTS slots.
+The bucket level is the sum of the slot counters from the last period, each
+weighted down linearly with its age as the tokens refill. Slot keys expire
+one period after their slot ends, so idle buckets simply drop out of the
+cache and need no cleanup job.
+
+Browser views are throttled by ThrottleMiddleware. DRF views use the
+throttle classes below (see REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES']),
+because token clients are only identified once DRF has authenticated them.
+Paths under THROTTLE_EXEMPT_PATHS (static files, media, sitemaps and the
+admin) are not charged: one listing page pulls dozens of thumbnails, and
+looking up request.user for each of them would load the session.
+
+Anonymous buckets are keyed on the client address from client_ip(), which
+only believes X-Forwarded-For entries added by THROTTLE_TRUSTED_PROXIES.
+Any client can put anything in that header, so trusting it blindly would
+give a scraper a fresh bucket with every request.
+"""
+import ipaddress
+import math
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_BUCKETS = {
+    'ip': {'capacity': 60, 'refill_rate': 1.0},
+    'user': {'capacity': 120, 'refill_rate': 2.0},
+    'token': {'capacity': 600, 'refill_rate': 10.0},
+}
+DEFAULT_SLOTS = 10
+
+
+def bucket_config(scope):
+    buckets = getattr(settings, 'THROTTLE_BUCKETS', DEFAULT_BUCKETS)
+    return buckets.get(scope) or DEFAULT_BUCKETS[scope]
+
+
+@lru_cache(maxsize=8)
+def _networks(proxies):
+    return tuple(ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+
+def _is_trusted(address, networks):
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def client_ip(request):
+    """REMOTE_ADDR, or the X-Forwarded-For entry just before the closest trusted proxy"""
+    address = request.META.get('REMOTE_ADDR', '')
+    networks = _networks(tuple(getattr(settings, 'THROTTLE_TRUSTED_PROXIES', ())))
+    if not networks:
+        return address
+    forwarded = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+    # walk back from our peer; every hop added by a trusted proxy names the one before it
+    while forwarded and _is_trusted(address, networks):
+        address = forwarded.pop()
+    return address
+
+
+def _cache():
+    return caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+
+def _incr(cache, key, delta, timeout):
+    if cache.add(key, delta, timeout):
+        return delta
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # expired between add() and incr()
+        cache.set(key, delta, timeout)
+        return delta
+
+
+def consume(scope, ident, cost=1, now=None):
+    """Spend ``cost`` tokens from a bucket; returns (allowed, seconds to wait)"""
+    config = bucket_config(scope)
+    capacity = config['capacity']
+    refill_rate = config['refill_rate']
+    slots = getattr(settings, 'THROTTLE_SLOTS', DEFAULT_SLOTS)
+    cost = min(cost, capacity)
+    period = capacity / refill_rate
+    slot_length = period / slots
+    now = time.time() if now is None else now
+    index = int(now // slot_length)
+    cache = _cache()
+    prefix = f'throttle:{scope}:{ident}'
+    current_key = f'{prefix}:{index}'
+    history = cache.get_many([f'{prefix}:{index - age}' for age in range(1, slots)])
+
+    spent = _incr(cache, current_key, cost, math.ceil(period + slot_length))
+    level = spent + sum(
+        history.get(f'{prefix}:{index - age}', 0) * (1 - age / slots)
+        for age in range(1, slots)
+    )
+    if level <= capacity:
+        return True, 0.0
+    # refund the refused request so hammering doesn't extend the block
+    try:
+        cache.decr(current_key, cost)
+    except ValueError:
+        # the slot expired since _incr(); there is nothing left to refund
+        pass
+    return False, (level - capacity) / refill_rate
+
+
+def view_cost(view_func, view_name=None):
+    """Cost weight of a view: ``throttle_cost`` on the class, else THROTTLE_VIEW_COSTS by url name"""
+    view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+    cost = getattr(view_class, 'throttle_cost', None)
+    if cost is None:
+        cost = getattr(settings, 'THROTTLE_VIEW_COSTS', {}).get(view_name, 1)
+    return cost
+
+
+def is_exempt(path):
+    return path.startswith(tuple(getattr(settings, 'THROTTLE_EXEMPT_PATHS', ())))
+
+
+def too_many_requests(wait):
+    response = HttpResponse('Too many requests, slow down.', status=429, content_type='text/plain')
+    response['Retry-After'] = str(max(1, math.ceil(wait)))
+    return response
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Base DRF throttle; subclasses set ``scope`` and define get_bucket_ident(request) -> key or None"""
+    scope = None
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        if not getattr(settings, 'THROTTLE_ENABLED', True):
+            return True
+        ident = self.get_bucket_ident(request)
+        if ident is None:
+            return True
+        allowed, self.wait_seconds = consume(self.scope, ident, getattr(view, 'throttle_cost', 1))
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class TokenThrottle(TokenBucketThrottle):
+    scope = 'token'
+
+    def get_bucket_ident(self, request):
+        # request.auth is the authtoken Token, which is issued one per user
+        return getattr(request.auth, 'user_id', None)
+
+
+class UserThrottle(TokenBucketThrottle):
+    scope = 'user'
+
+    def get_bucket_ident(self, request):
+        if getattr(request.auth, 'user_id', None) or not request.user.is_authenticated:
+            return None
+        return request.user.pk
+
+
+class IPThrottle(TokenBucketThrottle):
+    scope = 'ip'
+
+    def get_bucket_ident(self, request):
+        if request.user.is_authenticated:
+            return None
+        return client_ip(request)
+
+
+class ThrottleMiddleware:
+    """Token-bucket throttling for the server-rendered views (DRF views throttle themselves)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not getattr(settings, 'THROTTLE_ENABLED', True):
+            return None
+        if getattr(view_func, 'cls', None) is not None:
+            # DRF's as_view() sets .cls; those views run the DRF throttles
+            return None
+        if is_exempt(request.path_info):
+            return None
+        if request.user.is_authenticated:
+            scope, ident = 'user', request.user.pk
+        else:
+            scope, ident = 'ip', client_ip(request)
+        match = request.resolver_match
+        allowed, wait = consume(scope, ident, view_cost(view_func, match.view_name if match else None))
+        if allowed:
+            return None
+        return too_many_requests(wait)
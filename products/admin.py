@@ -1,8 +1,29 @@
 from django.contrib import admin
-from .models import Category, Product, ProductImage, Review
+from core.admin import AutocompleteFilter, LargeTableAdminMixin
+from .deletion import affected_products, schedule_deletion
+from .models import Category, DeletionJob, Product, ProductImage, Review
+from .moderation import moderate_user_reviews, set_review_approval
+
+
+class BackgroundDeletionAdminMixin:
+    """Delete through a DeletionJob instead of the CASCADE collector"""
+
+    def get_deleted_objects(self, objs, request):
+        # the stock confirmation page collects every cascaded row; summarise instead
+        counts = [(obj, affected_products(obj).count()) for obj in objs]
+        summary = [f'{obj} (with {count} products, deleted in the background)' for obj, count in counts]
+        return summary, {'products': sum(count for _, count in counts)}, set(), []
+
+    def delete_model(self, request, obj):
+        schedule_deletion(obj, requested_by=request.user)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            schedule_deletion(obj, requested_by=request.user)
+
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(BackgroundDeletionAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'is_active', 'created_at')
     list_filter = ('is_active', 'created_at')
     search_fields = ('name', 'description')
@@ -10,30 +31,39 @@ class CategoryAdmin(admin.ModelAdmin):
     list_editable = ('is_active',)
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'vendor', 'category', 'price', 'is_active', 'is_featured', 'created_at')
-    list_filter = ('is_active', 'is_featured', 'category', 'vendor', 'created_at')
+    list_select_related = ('vendor', 'category')
+    list_filter = (
+        'is_active', 'is_featured', ('category', AutocompleteFilter), ('vendor', AutocompleteFilter), 'created_at',
+    )
     search_fields = ('name', 'description', 'vendor__store_name')
     prepopulated_fields = {'slug': ('name',)}
     list_editable = ('is_active', 'is_featured', 'price')
     raw_id_fields = ('vendor',)
+    query_budget = 6
 
 @admin.register(ProductImage)
-class ProductImageAdmin(admin.ModelAdmin):
+class ProductImageAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('product', 'alt_text', 'is_primary')
-    list_filter = ('is_primary', 'product__category')
+    list_select_related = ('product',)
+    list_filter = ('is_primary', ('product__category', AutocompleteFilter))
     search_fields = ('product__name', 'alt_text')
     raw_id_fields = ('product',)
+    query_budget = 6
 
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('product', 'user', 'rating', 'is_verified', 'is_approved', 'created_at')
-    list_filter = ('rating', 'is_verified', 'is_approved', 'created_at', 'product__category')
+    list_select_related = ('product', 'user')
+    list_filter = ('rating', 'is_verified', 'is_approved', 'created_at', ('product__category', AutocompleteFilter))
     search_fields = ('product__name', 'user__username', 'title', 'comment')
     list_editable = ('is_approved',)
     raw_id_fields = ('user', 'product')
     readonly_fields = ('is_verified', 'created_at', 'updated_at')
+    query_budget = 6
+    actions = ['approve_reviews', 'reject_reviews', 'reject_all_from_authors']
     
     fieldsets = (
         ('Review Information', {
@@ -47,3 +77,31 @@ class ReviewAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+    @admin.action(description='Approve selected reviews')
+    def approve_reviews(self, request, queryset):
+        updated = set_review_approval(queryset, True)
+        self.message_user(request, f'{updated} review(s) approved.')
+
+    @admin.action(description='Reject selected reviews')
+    def reject_reviews(self, request, queryset):
+        updated = set_review_approval(queryset, False)
+        self.message_user(request, f'{updated} review(s) rejected.')
+
+    @admin.action(description='Reject every review by the authors of the selected reviews')
+    def reject_all_from_authors(self, request, queryset):
+        user_ids = set(queryset.order_by().values_list('user_id', flat=True).distinct())
+        updated = moderate_user_reviews(user_ids, False)
+        self.message_user(request, f'{updated} review(s) from {len(user_ids)} user(s) rejected.')
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = ('object_repr', 'model_label', 'status', 'percent_done', 'products_deleted', 'products_total',
+                    'files_deleted', 'created_at', 'finished_at')
+    list_filter = ('status', 'model_label')
+    search_fields = ('object_repr',)
+    readonly_fields = [field.name for field in DeletionJob._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,197 @@
+"""
+Catalog integration endpoints that work on many records per request.
+"""
+import io
+from decimal import Decimal
+
+from django.db import IntegrityError
+from rest_framework import exceptions, permissions, serializers, status
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .batch import sync_stock, upsert_products
+from .models import Product
+from .sku import resolve_skus
+
+MAX_SKUS_PER_REQUEST = 500
+MAX_BATCH_ITEMS = 1000
+MAX_BATCH_BYTES = 2 * 1024 * 1024
+
+
+class SkuResolveSerializer(serializers.Serializer):
+    skus = serializers.ListField(
+        child=serializers.CharField(max_length=80),
+        allow_empty=False,
+        max_length=MAX_SKUS_PER_REQUEST,
+    )
+
+
+class SkuResolveView(APIView):
+    """POST {"skus": [...]} -> product/variant for every SKU in one lookup.
+
+    Vendors resolve their own SKUs, inactive products included; everyone else
+    only sees active products.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_cost = 5
+
+    def post(self, request):
+        serializer = SkuResolveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        vendor = getattr(request.user, 'vendor', None)
+        if vendor is not None:
+            resolved = resolve_skus(serializer.validated_data['skus'], vendor_id=vendor.pk)
+        else:
+            resolved = resolve_skus(serializer.validated_data['skus'], active_only=True)
+        results = []
+        for sku, row in resolved.items():
+            if row is None:
+                results.append({'sku': sku, 'found': False})
+                continue
+            entry = {
+                'sku': sku,
+                'found': True,
+                'product': {
+                    'id': row['product_id'],
+                    'name': row['product__name'],
+                    'slug': row['product__slug'],
+                    'price': str(row['product__price']),
+                    'stock_quantity': row['product__stock_quantity'],
+                    'is_active': row['product__is_active'],
+                },
+                'variant': None,
+            }
+            if row['variant_id']:
+                entry['variant'] = {
+                    'id': row['variant_id'],
+                    'name': row['variant__name'],
+                    'value': row['variant__value'],
+                    'price_adjustment': str(row['variant__price_adjustment']),
+                    'stock_quantity': row['variant__stock_quantity'],
+                }
+            results.append(entry)
+        return Response({'count': len(results), 'results': results})
+
+
+class BatchConflict(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The batch conflicted with a concurrent change; nothing was written, retry it.'
+    default_code = 'conflict'
+
+
+class BatchTooLarge(exceptions.APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = f'Batch bodies are limited to {MAX_BATCH_BYTES} bytes.'
+    default_code = 'too_large'
+
+
+class BoundedJSONParser(JSONParser):
+    """JSONParser that reads at most MAX_BATCH_BYTES, whatever Content-Length says (or if it is absent)"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        body = stream.read(MAX_BATCH_BYTES + 1)
+        if len(body) > MAX_BATCH_BYTES:
+            raise BatchTooLarge()
+        return super().parse(io.BytesIO(body), media_type, parser_context)
+
+
+class IsVendor(permissions.BasePermission):
+    message = 'Only vendors can use the batch endpoints.'
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and hasattr(request.user, 'vendor'))
+
+
+class ProductBatchItemSerializer(serializers.Serializer):
+    """One upsert item. Every field is optional so existing products can be patched"""
+    sku = serializers.CharField(max_length=50, required=False)
+    name = serializers.CharField(max_length=200, required=False)
+    category = serializers.IntegerField(source='category_id', required=False)
+    description = serializers.CharField(required=False, allow_blank=True)
+    short_description = serializers.CharField(max_length=300, required=False, allow_blank=True)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'), required=False)
+    compare_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'), required=False, allow_null=True)
+    condition = serializers.ChoiceField(choices=Product.CONDITION_CHOICES, required=False)
+    stock_quantity = serializers.IntegerField(min_value=0, required=False)
+    track_inventory = serializers.BooleanField(required=False)
+    weight = serializers.DecimalField(max_digits=6, decimal_places=2, required=False, allow_null=True)
+    dimensions = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    is_digital = serializers.BooleanField(required=False)
+    is_active = serializers.BooleanField(required=False)
+    meta_title = serializers.CharField(max_length=200, required=False, allow_blank=True)
+    meta_description = serializers.CharField(max_length=300, required=False, allow_blank=True)
+
+
+class StockSyncItemSerializer(serializers.Serializer):
+    sku = serializers.CharField(max_length=80)
+    stock_quantity = serializers.IntegerField(min_value=0)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'), required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    items = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=MAX_BATCH_ITEMS,
+    )
+
+
+class BatchView(APIView):
+    """Base for endpoints taking {"items": [...]} and answering per item.
+
+    Items are validated with a single serializer instance. Invalid ones are
+    reported back and the valid ones are still applied in one transaction.
+    Subclasses set item_serializer_class and define apply(vendor, items),
+    returning one result dict per item.
+    """
+    permission_classes = [IsVendor]
+    parser_classes = [BoundedJSONParser]
+    throttle_cost = 20
+    item_serializer_class = None
+
+    def post(self, request):
+        if int(request.META.get('CONTENT_LENGTH') or 0) > MAX_BATCH_BYTES:
+            # reject declared oversize bodies before reading them; the parser bounds the rest
+            raise BatchTooLarge()
+        batch = BatchSerializer(data=request.data)
+        batch.is_valid(raise_exception=True)
+        items = batch.validated_data['items']
+
+        child = self.item_serializer_class()
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, child.run_validation(item)))
+            except serializers.ValidationError as exc:
+                results[index] = {'index': index, 'sku': item.get('sku', ''), 'status': 'error', 'errors': exc.detail}
+
+        try:
+            applied = self.apply(request.user.vendor, [data for _, data in valid])
+        except IntegrityError:
+            raise BatchConflict()
+        for (index, _), result in zip(valid, applied):
+            result['index'] = index
+            results[index] = result
+
+        counts = {}
+        for result in results:
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+        return Response({'count': len(results), 'summary': counts, 'results': results})
+
+
+class ProductBatchUpsertView(BatchView):
+    """POST {"items": [{"sku": ..., "name": ..., "price": ...}, ...]} -> create or update by SKU"""
+    item_serializer_class = ProductBatchItemSerializer
+
+    def apply(self, vendor, items):
+        return upsert_products(vendor, items)
+
+
+class StockSyncView(BatchView):
+    """POST {"items": [{"sku": ..., "stock_quantity": ..., "price": ...}, ...]} -> stock/price for known SKUs"""
+    item_serializer_class = StockSyncItemSerializer
+
+    def apply(self, vendor, items):
+        return sync_stock(vendor, items)
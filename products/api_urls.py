@@ -0,0 +1,10 @@
+from django.urls import path
+from . import api
+
+app_name = 'products_api'
+
+urlpatterns = [
+    path('skus/resolve/', api.SkuResolveView.as_view(), name='sku_resolve'),
+    path('products/batch/', api.ProductBatchUpsertView.as_view(), name='product_batch_upsert'),
+    path('products/batch/stock/', api.StockSyncView.as_view(), name='product_stock_sync'),
+]
@@ -0,0 +1,214 @@
+"""
+Batch product upsert and stock sync for vendor integrations.
+
+An ERP pushing thousands of SKUs should not pay one request, one slug probe,
+one counter update and one tweet per product. Here a whole batch is applied
+at once. Existing products are loaded with one query, new ones get their
+SKUs from a single counter block and their slugs from one prefix lookup,
+and the writes go through bulk_create/bulk_update in one transaction. Model
+save() and signals are bypassed, so per-item side effects (tweets, SKU
+index updates, change events) don't fire. The SKU index and the
+change-event bus are updated once for the whole batch instead.
+
+Every function returns one result dict per input item, in input order.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from core import events
+
+from .cards import invalidate_card_scopes
+from .models import Category, Product, ProductVariant, SkuIndex, compute_discount_percent
+from .sku import assign_skus
+
+WRITE_BATCH_SIZE = 500
+SLUG_LOOKUP_CHUNK = 100
+
+UPSERT_FIELDS = (
+    'name', 'description', 'short_description', 'price', 'compare_price', 'condition',
+    'stock_quantity', 'track_inventory', 'weight', 'dimensions', 'is_digital', 'is_active',
+    'meta_title', 'meta_description', 'category_id',
+)
+REQUIRED_FOR_CREATE = ('name', 'description', 'price', 'category_id')
+
+
+def _error(index, sku, errors):
+    return {'index': index, 'sku': sku, 'status': 'error', 'errors': errors}
+
+
+def unique_slugs(base_slugs):
+    """Unique slugs for many new products, one prefix query per chunk of bases.
+
+    Same numbering as Product._generate_unique_slug: base, base-1, base-2 ...
+    """
+    bases = list(dict.fromkeys(base_slugs))
+    taken = set()
+    for start in range(0, len(bases), SLUG_LOOKUP_CHUNK):
+        prefixes = Q()
+        for base in bases[start:start + SLUG_LOOKUP_CHUNK]:
+            prefixes |= Q(slug__startswith=base)
+        taken.update(Product.objects.filter(prefixes).values_list('slug', flat=True))
+    slugs = []
+    for base in base_slugs:
+        slug = base
+        counter = 1
+        while slug in taken:
+            slug = f"{base}-{counter}"
+            counter += 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def upsert_products(vendor, items):
+    """Create or update the vendor's products keyed by SKU.
+
+    ``items`` are validated dicts using model field names (``sku`` optional,
+    ``category_id`` for the category). Items without a known SKU are created;
+    their SKU is allocated unless one is supplied.
+    """
+    results = [None] * len(items)
+    skus = {item['sku'] for item in items if item.get('sku')}
+    existing = {product.sku: product for product in Product.objects.filter(sku__in=skus)}
+    category_ids = {item['category_id'] for item in items if 'category_id' in item}
+    known_categories = set(Category.objects.filter(id__in=category_ids).values_list('id', flat=True))
+
+    now = timezone.now()
+    seen = set()
+    to_create = []
+    to_update = []
+    changed_fields = set()
+    left_categories = set()
+    for index, item in enumerate(items):
+        sku = item.get('sku') or ''
+        if sku and sku in seen:
+            results[index] = _error(index, sku, {'sku': ['Duplicate SKU in this batch.']})
+            continue
+        seen.add(sku)
+        if 'category_id' in item and item['category_id'] not in known_categories:
+            results[index] = _error(index, sku, {'category': ['Unknown category.']})
+            continue
+
+        product = existing.get(sku)
+        if product is not None:
+            if product.vendor_id != vendor.pk:
+                results[index] = _error(index, sku, {'sku': ['SKU belongs to another vendor.']})
+                continue
+            changes = [
+                field for field in UPSERT_FIELDS
+                if field in item and getattr(product, field) != item[field]
+            ]
+            if 'category_id' in changes:
+                left_categories.add(product.category_id)
+            for field in changes:
+                setattr(product, field, item[field])
+            if {'price', 'compare_price'} & set(changes):
+                # bulk_update skips save(), which normally keeps this in step
+                product.discount_percent = compute_discount_percent(product.price, product.compare_price)
+                changes.append('discount_percent')
+            if changes:
+                product.updated_at = now
+                changed_fields.update(changes)
+                to_update.append(product)
+            results[index] = {'index': index, 'sku': sku, 'status': 'updated' if changes else 'unchanged', 'id': product.pk}
+            continue
+
+        missing = [field for field in REQUIRED_FOR_CREATE if field not in item]
+        if missing:
+            errors = {field.removesuffix('_id'): ['This field is required to create a product.'] for field in missing}
+            results[index] = _error(index, sku, errors)
+            continue
+        product = Product(vendor=vendor, sku=sku, **{field: item[field] for field in UPSERT_FIELDS if field in item})
+        product.discount_percent = compute_discount_percent(product.price, product.compare_price)
+        to_create.append((index, product))
+
+    with transaction.atomic():
+        if to_create:
+            new_products = [product for _, product in to_create]
+            assign_skus(new_products)
+            bases = [slugify(f"{product.name}-{vendor.store_name}") for product in new_products]
+            for product, slug in zip(new_products, unique_slugs(bases)):
+                product.slug = slug
+            Product.objects.bulk_create(new_products, batch_size=WRITE_BATCH_SIZE)
+            # not every backend returns ids from bulk inserts
+            ids = dict(Product.objects.filter(sku__in=[p.sku for p in new_products]).values_list('sku', 'id'))
+            for index, product in to_create:
+                product.pk = ids[product.sku]
+                results[index] = {'index': index, 'sku': product.sku, 'status': 'created', 'id': product.pk}
+            SkuIndex.objects.bulk_create(
+                [SkuIndex(sku=product.sku, product_id=product.pk) for product in new_products],
+                batch_size=WRITE_BATCH_SIZE,
+            )
+        if to_update:
+            Product.objects.bulk_update(to_update, [*changed_fields, 'updated_at'], batch_size=WRITE_BATCH_SIZE)
+        events.publish(Product, [product.pk for _, product in to_create] + [product.pk for product in to_update])
+        if left_categories:
+            # the change event only leads to the products' new categories
+            transaction.on_commit(lambda: invalidate_card_scopes(category_ids=left_categories))
+    return results
+
+
+def sync_stock(vendor, items):
+    """Set stock (and optionally product price) for product or variant SKUs.
+
+    ``items`` are dicts with ``sku``, ``stock_quantity`` and optional ``price``.
+    Only SKUs already owned by the vendor are touched.
+    """
+    results = [None] * len(items)
+    rows = {
+        row['sku']: row
+        for row in SkuIndex.objects.filter(
+            sku__in={item['sku'] for item in items}, product__vendor=vendor
+        ).values('sku', 'product_id', 'variant_id')
+    }
+    products = Product.objects.only('id', 'stock_quantity', 'price', 'compare_price').in_bulk(
+        {row['product_id'] for row in rows.values() if not row['variant_id']}
+    )
+    variants = ProductVariant.objects.only('id', 'stock_quantity').in_bulk(
+        {row['variant_id'] for row in rows.values() if row['variant_id']}
+    )
+
+    now = timezone.now()
+    product_updates = {}
+    variant_updates = {}
+    for index, item in enumerate(items):
+        sku = item['sku']
+        row = rows.get(sku)
+        if row is None:
+            results[index] = _error(index, sku, {'sku': ['Unknown SKU.']})
+            continue
+        if row['variant_id']:
+            if 'price' in item:
+                results[index] = _error(index, sku, {'price': ['Variant prices are set on the product.']})
+                continue
+            target = variants[row['variant_id']]
+            updates = variant_updates
+        else:
+            target = products[row['product_id']]
+            updates = product_updates
+        changed = False
+        for field in ('stock_quantity', 'price'):
+            if field in item and getattr(target, field) != item[field]:
+                setattr(target, field, item[field])
+                changed = True
+        if changed:
+            if updates is product_updates:
+                target.discount_percent = compute_discount_percent(target.price, target.compare_price)
+            updates[target.pk] = target
+        results[index] = {'index': index, 'sku': sku, 'status': 'updated' if changed else 'unchanged', 'id': target.pk}
+
+    with transaction.atomic():
+        if product_updates:
+            for product in product_updates.values():
+                product.updated_at = now
+            Product.objects.bulk_update(
+                product_updates.values(), ['stock_quantity', 'price', 'discount_percent', 'updated_at'],
+                batch_size=WRITE_BATCH_SIZE,
+            )
+            events.publish(Product, product_updates)
+        if variant_updates:
+            ProductVariant.objects.bulk_update(variant_updates.values(), ['stock_quantity'], batch_size=WRITE_BATCH_SIZE)
+            events.publish(ProductVariant, variant_updates)
+    return results
@@ -0,0 +1,178 @@
+"""
+Lightweight product cards for listing pages.
+
+Listing templates only need a handful of columns. product_card_rows() selects
+them with a narrow values() query, joining in the vendor and category names
+and the primary image path. to_cards() then wraps each row in a slotted
+ProductCard instead of a full Product instance. ProductCard exposes the same
+attribute names as the Product card helpers (vendor_name, category_name,
+image_url, ...), so templates render either one.
+
+cached_card_rows() keeps evaluated rows in the cache. Each cached list
+belongs to one vendor or one category (its scope), and its key carries two
+generations: a global one and one for the scope. Saving products or images
+bumps only the scopes those products belong to, so a review aggregate
+refresh or a batch upsert for one vendor leaves other storefronts and
+categories cached. Product moves also bump the scope the product left
+(see remember_card_scope and products.batch). Deletes are published without
+the deleted rows' vendor and category, and vendor or category edits change
+names shown on every card, so those bump the global generation.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+from django.urls import reverse
+
+from core import events
+from core.cache import bump_generation, generation, get_or_compute
+
+from .models import Product, ProductImage
+
+CARD_FIELDS = (
+    'id', 'name', 'slug', 'short_description', 'price', 'compare_price', 'condition',
+    'stock_quantity', 'track_inventory', 'rating_average', 'review_count', 'discount_percent', 'vendor_id',
+)
+
+CONDITION_LABELS = dict(Product.CONDITION_CHOICES)
+CARDS_GENERATION = 'product-cards'
+CARDS_TIMEOUT = 60 * 10
+
+
+@dataclass(slots=True, frozen=True)
+class ProductCard:
+    id: int
+    name: str
+    slug: str
+    short_description: str
+    price: Decimal
+    compare_price: Decimal | None
+    condition: str
+    stock_quantity: int
+    track_inventory: bool
+    rating_average: float
+    review_count: int
+    discount_percent: int
+    vendor_id: int
+    vendor_name: str
+    category_name: str
+    category_slug: str
+    image: str | None
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def image_url(self):
+        return default_storage.url(self.image) if self.image else ''
+
+    @property
+    def average_rating(self):
+        return self.rating_average
+
+    @property
+    def total_reviews(self):
+        return self.review_count
+
+    @property
+    def is_in_stock(self):
+        return not self.track_inventory or self.stock_quantity > 0
+
+    @property
+    def discount_percentage(self):
+        return self.discount_percent
+
+    def get_condition_display(self):
+        return CONDITION_LABELS.get(self.condition, self.condition)
+
+    def get_absolute_url(self):
+        return reverse('products:detail', kwargs={'slug': self.slug})
+
+
+def primary_image_subquery():
+    return Subquery(
+        ProductImage.objects.filter(product=OuterRef('pk'))
+        .order_by('-is_primary', 'order', 'id')
+        .values('image')[:1]
+    )
+
+
+def product_card_rows(queryset):
+    """Narrow values() queryset with everything a card needs; paginate it like any queryset"""
+    return queryset.values(
+        *CARD_FIELDS,
+        vendor_name=F('vendor__store_name'),
+        category_name=F('category__name'),
+        category_slug=F('category__slug'),
+        image=primary_image_subquery(),
+    )
+
+
+def to_cards(rows):
+    return [ProductCard(**row) for row in rows]
+
+
+def product_cards(queryset):
+    """Evaluate a product queryset straight into cards"""
+    return to_cards(product_card_rows(queryset))
+
+
+def scope_generation(kind, pk):
+    return f'{CARDS_GENERATION}:{kind}:{pk}'
+
+
+def cards_cache_key(name, kind, pk):
+    """Key for cards of one vendor or category; ``kind`` is 'vendor' or 'category'"""
+    return f'cards:{generation(CARDS_GENERATION)}.{generation(scope_generation(kind, pk))}:{name}'
+
+
+def cached_card_rows(name, queryset, kind, pk, timeout=CARDS_TIMEOUT):
+    """product_card_rows(queryset) as a list, cached single-flight under ``name`` in one scope"""
+    return get_or_compute(cards_cache_key(name, kind, pk), lambda: list(product_card_rows(queryset)), timeout)
+
+
+def invalidate_card_scopes(vendor_ids=(), category_ids=()):
+    for vendor_id in set(vendor_ids):
+        bump_generation(scope_generation('vendor', vendor_id))
+    for category_id in set(category_ids):
+        bump_generation(scope_generation('category', category_id))
+
+
+@receiver(pre_save, sender=Product)
+def remember_card_scope(sender, instance, update_fields=None, **kwargs):
+    """A product moving to another vendor or category also leaves the old scope's cards"""
+    if instance._state.adding or (update_fields is not None and not {'vendor', 'category'} & set(update_fields)):
+        return
+    previous = sender._base_manager.filter(pk=instance.pk).values('vendor_id', 'category_id').first()
+    if previous is None:
+        return
+    vendor_ids = [previous['vendor_id']] if previous['vendor_id'] != instance.vendor_id else []
+    category_ids = [previous['category_id']] if previous['category_id'] != instance.category_id else []
+    if vendor_ids or category_ids:
+        transaction.on_commit(lambda: invalidate_card_scopes(vendor_ids, category_ids))
+
+
+@events.subscribe(models=['products.Product', 'products.ProductImage', 'products.Category', 'vendors.Vendor'])
+def invalidate_cards(change_events):
+    product_ids = set()
+    image_ids = set()
+    for event in change_events:
+        if event.action == events.DELETED or event.model in ('products.Category', 'vendors.Vendor'):
+            bump_generation(CARDS_GENERATION)
+            return
+        if event.model == 'products.Product':
+            product_ids |= event.pks
+        else:
+            image_ids |= event.pks
+    products = Product._base_manager.none()
+    if product_ids:
+        products |= Product._base_manager.filter(pk__in=product_ids)
+    if image_ids:
+        products |= Product._base_manager.filter(images__pk__in=image_ids)
+    scopes = list(products.order_by().values_list('vendor_id', 'category_id').distinct())
+    invalidate_card_scopes([vendor_id for vendor_id, _ in scopes], [category_id for _, category_id in scopes])
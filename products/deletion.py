@@ -0,0 +1,281 @@
+"""
+Background cascade deletion for vendors and categories.
+
+Deleting a vendor or category through Model.delete() makes Django's
+collector load every related product, image, variant and review into
+memory. It then deletes them all in one long transaction. For a large
+vendor that times out the request and holds locks on the catalog tables.
+
+schedule_deletion() instead does only the cheap part inside the request:
+- it hides the object right away (products are set inactive with one
+  UPDATE, and categories too);
+- it records a DeletionJob;
+- it starts the job on a background thread once the transaction commits.
+
+CascadeDeleter walks the reverse relations from the model metadata.
+Dependents are removed bottom-up in batches of primary keys, and every
+batch is a set-based DELETE ... WHERE pk IN (...) in its own short
+transaction. No model instances are loaded, so memory stays flat whatever
+the size of the vendor. The on_delete rules are honoured: SET_NULL and
+SET_DEFAULT become an UPDATE. Like Django's collector, the job refuses
+before deleting anything when a PROTECT/RESTRICT relation references any
+row of the tree. check() walks the same batches first, reading only
+primary keys. A blocked job restores the products and categories that
+scheduling hid and ends as BLOCKED. A job that fails after it has started
+deleting ends as FAILED and keeps the rest hidden, because that catalog is
+already incomplete. Files referenced by deleted rows are removed from storage after each
+batch commits, unless another row still points at the same file. With the
+reference-counted core.storage backend, their references are released
+instead.
+
+Raw deletes skip post_delete signals, so change events are published for
+each batch instead. Jobs are idempotent: the run_deletion_jobs command
+resumes jobs that were interrupted, for example by a restart.
+"""
+import logging
+import threading
+from collections import Counter
+
+from django.apps import apps
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+
+from core import events
+
+from .models import Category, DeletionJob, Product
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH_SIZE = 500
+
+
+class DeletionBlocked(Exception):
+    """A PROTECT/RESTRICT relation still references rows being deleted"""
+
+
+def category_subtree_ids(category_id):
+    """The category and all its descendants, one query per level"""
+    ids = [category_id]
+    level = [category_id]
+    while level:
+        level = list(Category.objects.filter(parent_id__in=level).values_list('pk', flat=True))
+        ids.extend(level)
+    return ids
+
+
+def affected_products(obj):
+    if isinstance(obj, Category):
+        return Product.objects.filter(category_id__in=category_subtree_ids(obj.pk))
+    return Product.objects.filter(vendor_id=obj.pk)
+
+
+def deactivate(obj):
+    """Hide the object's catalog immediately; returns (products affected, what restore() needs)"""
+    products = affected_products(obj)
+    product_ids = list(products.values_list('pk', flat=True))
+    # stamp the rows we hide so restore() leaves products that were already inactive alone
+    stamp = timezone.now()
+    products.filter(is_active=True).update(is_active=False, updated_at=stamp)
+    events.publish(Product, product_ids, events.SAVED)
+    hidden = {'products_at': stamp.isoformat(), 'categories': []}
+    if isinstance(obj, Category):
+        categories = Category.objects.filter(pk__in=category_subtree_ids(obj.pk), is_active=True)
+        hidden['categories'] = list(categories.values_list('pk', flat=True))
+        categories.update(is_active=False)
+        events.publish(Category, hidden['categories'], events.SAVED)
+    return len(product_ids), hidden
+
+
+def restore(obj, hidden):
+    """Undo deactivate() for a job that was blocked before it deleted anything"""
+    if hidden.get('categories'):
+        Category.objects.filter(pk__in=hidden['categories']).update(is_active=True)
+        events.publish(Category, hidden['categories'], events.SAVED)
+    if hidden.get('products_at'):
+        products = affected_products(obj).filter(is_active=False, updated_at=hidden['products_at'])
+        product_ids = list(products.values_list('pk', flat=True))
+        products.update(is_active=True, updated_at=timezone.now())
+        events.publish(Product, product_ids, events.SAVED)
+
+
+def schedule_deletion(obj, requested_by=None):
+    """Deactivate ``obj`` now and delete it with everything under it in the background"""
+    with transaction.atomic():
+        total, hidden = deactivate(obj)
+        job = DeletionJob.objects.create(
+            model_label=obj._meta.label,
+            object_id=obj.pk,
+            object_repr=str(obj)[:200],
+            requested_by=requested_by if requested_by and requested_by.is_authenticated else None,
+            products_total=total,
+            hidden=hidden,
+        )
+        transaction.on_commit(lambda: start_in_background(job.pk))
+    return job
+
+
+def _run_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def start_in_background(job_id):
+    thread = threading.Thread(target=_run_in_thread, args=(job_id,), name=f'deletion-job-{job_id}', daemon=True)
+    thread.start()
+    return thread
+
+
+def _reverse_relations(model):
+    """Relations pointing at ``model``, including hidden m2m through tables"""
+    return [
+        field for field in model._meta.get_fields(include_hidden=True)
+        if field.auto_created and not field.concrete and (field.one_to_many or field.one_to_one)
+    ]
+
+
+def _blocked_message(relation, model):
+    return f'{relation.related_model._meta.label} rows still reference {model._meta.label} and are protected'
+
+
+class CascadeDeleter:
+    """Set-based, batched replacement for the CASCADE collector"""
+
+    def __init__(self, job=None, batch_size=DELETE_BATCH_SIZE, remove_files=True):
+        self.job = job
+        self.batch_size = batch_size
+        self.remove_files = remove_files
+        self.counts = Counter()
+        self.files_deleted = 0
+
+    def check(self, model, queryset):
+        """Raise DeletionBlocked if a PROTECT/RESTRICT relation references any row delete() would remove"""
+        last_pk = None
+        while True:
+            batch = queryset.order_by('pk') if last_pk is None else queryset.filter(pk__gt=last_pk).order_by('pk')
+            pks = list(batch.values_list('pk', flat=True)[:self.batch_size])
+            if not pks:
+                return
+            last_pk = pks[-1]
+            for relation in _reverse_relations(model):
+                related = relation.related_model._base_manager.filter(**{f'{relation.field.name}__in': pks})
+                if relation.on_delete in (models.PROTECT, models.RESTRICT):
+                    if related.exists():
+                        raise DeletionBlocked(_blocked_message(relation, model))
+                elif relation.on_delete is models.CASCADE:
+                    self.check(relation.related_model, related)
+
+    def delete(self, model, queryset):
+        """Delete every row of ``queryset`` and, before each batch, whatever cascades from it"""
+        while True:
+            pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:self.batch_size])
+            if not pks:
+                return
+            for relation in _reverse_relations(model):
+                if relation.on_delete is models.CASCADE:
+                    related = relation.related_model
+                    self.delete(related, related._base_manager.filter(**{f'{relation.field.name}__in': pks}))
+            self._delete_batch(model, pks)
+
+    def _delete_batch(self, model, pks):
+        alias = router.db_for_write(model)
+        files = []
+        with transaction.atomic(using=alias):
+            for relation in _reverse_relations(model):
+                related = relation.related_model._base_manager.using(alias).filter(
+                    **{f'{relation.field.name}__in': pks}
+                )
+                if relation.on_delete in (models.PROTECT, models.RESTRICT):
+                    # check() ran first; this only trips on a reference added since
+                    if related.exists():
+                        raise DeletionBlocked(_blocked_message(relation, model))
+                elif relation.on_delete is models.SET_NULL:
+                    related.update(**{relation.field.name: None})
+                elif relation.on_delete is models.SET_DEFAULT:
+                    related.update(**{relation.field.name: relation.field.get_default()})
+            rows = model._base_manager.using(alias).filter(pk__in=pks)
+            for field in model._meta.concrete_fields:
+                if isinstance(field, models.FileField):
+                    names = list(rows.exclude(**{field.attname: ''}).values_list(field.attname, flat=True))
+                    files.append((model, field, [name for name in names if name]))
+            deleted = rows._raw_delete(alias)
+            events.publish(model, pks, events.DELETED, using=alias)
+        self.counts[model._meta.label] += deleted
+        if self.remove_files:
+            self.files_deleted += self._remove_orphans(files)
+        self._report(model, deleted)
+
+    def _remove_orphans(self, files):
+        removed = 0
+        for model, field, names in files:
+            if not names:
+                continue
+            if hasattr(field.storage, 'release'):
+                # reference-counted storage (core.storage) frees its own blobs
+                field.storage.release(names)
+                continue
+            names = set(names)
+            still_used = set(
+                model._base_manager.filter(**{f'{field.attname}__in': names}).values_list(field.attname, flat=True)
+            )
+            for name in names - still_used:
+                try:
+                    field.storage.delete(name)
+                    removed += 1
+                except OSError:
+                    logger.warning('Could not delete orphaned file %s', name, exc_info=True)
+        return removed
+
+    def _report(self, model, deleted):
+        if self.job is None:
+            return
+        self.job.rows_deleted = dict(self.counts)
+        self.job.files_deleted = self.files_deleted
+        update_fields = ['rows_deleted', 'files_deleted', 'updated_at']
+        if model is Product:
+            self.job.products_deleted += deleted
+            update_fields.append('products_deleted')
+        self.job.save(update_fields=update_fields)
+
+
+def run_job(job_id, resume=False, retry_failed=False):
+    """Claim and run one job; returns it (or None when another runner has it)"""
+    claimable = [DeletionJob.PENDING, DeletionJob.RUNNING] if resume else [DeletionJob.PENDING]
+    if retry_failed:
+        claimable.append(DeletionJob.FAILED)
+    claimed = DeletionJob.objects.filter(pk=job_id, status__in=claimable).update(
+        status=DeletionJob.RUNNING, started_at=timezone.now(), error='',
+    )
+    if not claimed:
+        return None
+    job = DeletionJob.objects.get(pk=job_id)
+    try:
+        model = apps.get_model(job.model_label)
+        deleter = CascadeDeleter(job)
+        deleter.counts.update(job.rows_deleted)
+        deleter.files_deleted = job.files_deleted
+        queryset = model._base_manager.filter(pk=job.object_id)
+        deleter.check(model, queryset)
+        deleter.delete(model, queryset)
+        job.status = DeletionJob.DONE
+    except DeletionBlocked as exc:
+        job.error = str(exc)
+        if job.rows_deleted:
+            # a reference appeared mid-run; what is left stays hidden
+            logger.error('Deletion job %s blocked after deleting rows: %s', job.pk, exc)
+            job.status = DeletionJob.FAILED
+        else:
+            logger.warning('Deletion job %s blocked: %s', job.pk, exc)
+            obj = queryset.first()
+            if obj is not None:
+                restore(obj, job.hidden)
+            job.status = DeletionJob.BLOCKED
+    except Exception as exc:
+        logger.exception('Deletion job %s failed', job.pk)
+        job.status = DeletionJob.FAILED
+        job.error = str(exc)
+    finally:
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+    return job
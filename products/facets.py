@@ -0,0 +1,224 @@
+"""
+Facet counts for catalog search.
+
+The search page filters on text, category, vendor, condition and price.
+Showing how many results each option would leave used to take one COUNT per
+option. compute_facets() instead runs a single grouped query over the
+current result set. It groups by category, vendor, condition and a price
+bucket worked out with one CASE expression, then folds the rows into
+per-facet counts in Python.
+
+Results are cached under a key built from the normalized filters and a
+catalog generation. The generation moves on whenever products, categories
+or vendors change, so stale counts are never served after an edit. Misses
+are single-flight (core.cache.get_or_compute), so a generation bump does
+not send every concurrent search to the database at once.
+"""
+import copy
+import hashlib
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+from django.http import QueryDict
+
+from core import events
+from core.cache import bump_generation, generation, get_or_compute
+
+from .models import Product
+
+FACETS_TIMEOUT = 60 * 5
+FACETS_GENERATION = 'facets'
+FILTER_PARAMS = ('q', 'category', 'vendor', 'condition', 'min_price', 'max_price', 'on_sale')
+
+# (lower bound inclusive, upper bound exclusive); None means open-ended
+PRICE_BUCKETS = (
+    (Decimal('0'), Decimal('25')),
+    (Decimal('25'), Decimal('50')),
+    (Decimal('50'), Decimal('100')),
+    (Decimal('100'), Decimal('250')),
+    (Decimal('250'), Decimal('500')),
+    (Decimal('500'), None),
+)
+CONDITION_LABELS = dict(Product.CONDITION_CHOICES)
+
+
+def _decimal(value):
+    try:
+        return Decimal(value).quantize(Decimal('0.01'))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+
+
+def normalize_filters(params):
+    """The search filters from a GET QueryDict, cleaned so equal searches compare equal"""
+    filters = {}
+    query = ' '.join((params.get('q') or '').split()).lower()
+    if query:
+        filters['q'] = query
+    if params.get('category'):
+        filters['category'] = params['category'].strip().lower()
+    vendor = (params.get('vendor') or '').strip()
+    if vendor.isdigit():
+        filters['vendor'] = int(vendor)
+    if params.get('on_sale'):
+        filters['on_sale'] = True
+    if params.get('condition') in CONDITION_LABELS:
+        filters['condition'] = params['condition']
+    for name in ('min_price', 'max_price'):
+        value = _decimal(params.get(name))
+        if value is not None:
+            filters[name] = value
+    return filters
+
+
+def filter_products(filters, queryset=None):
+    if queryset is None:
+        queryset = Product.objects.all()
+    queryset = queryset.filter(is_active=True)
+    if 'q' in filters:
+        queryset = queryset.filter(
+            Q(name__icontains=filters['q'])
+            | Q(short_description__icontains=filters['q'])
+            | Q(description__icontains=filters['q'])
+        )
+    if 'category' in filters:
+        queryset = queryset.filter(category__slug=filters['category'])
+    if 'vendor' in filters:
+        queryset = queryset.filter(vendor_id=filters['vendor'])
+    if filters.get('on_sale'):
+        queryset = queryset.on_sale()
+    if 'condition' in filters:
+        queryset = queryset.filter(condition=filters['condition'])
+    if 'min_price' in filters:
+        queryset = queryset.filter(price__gte=filters['min_price'])
+    if 'max_price' in filters:
+        queryset = queryset.filter(price__lte=filters['max_price'])
+    return queryset
+
+
+def price_bucket_expression():
+    """CASE price WHEN < bound THEN bucket index ... - one pass, no per-bucket COUNT"""
+    whens = [
+        When(price__lt=upper, then=Value(index))
+        for index, (_, upper) in enumerate(PRICE_BUCKETS)
+        if upper is not None
+    ]
+    return Case(*whens, default=Value(len(PRICE_BUCKETS) - 1), output_field=IntegerField())
+
+
+def _bucket_label(lower, upper):
+    return f'${lower:,.0f}+' if upper is None else f'${lower:,.0f} - ${upper:,.0f}'
+
+
+def compute_facets(filters):
+    """All facet counts for the filtered result set from one grouped query"""
+    rows = (
+        filter_products(filters)
+        .order_by()
+        .annotate(price_bucket=price_bucket_expression())
+        .values(
+            'category__slug', 'category__name', 'vendor_id', 'vendor__store_name',
+            'condition', 'price_bucket',
+        )
+        .annotate(count=Count('id'))
+    )
+    total = 0
+    categories = {}
+    vendors = {}
+    conditions = {}
+    buckets = [0] * len(PRICE_BUCKETS)
+    for row in rows:
+        count = row['count']
+        total += count
+        category = categories.setdefault(
+            row['category__slug'], {'slug': row['category__slug'], 'name': row['category__name'], 'count': 0}
+        )
+        category['count'] += count
+        vendor = vendors.setdefault(
+            row['vendor_id'], {'id': row['vendor_id'], 'name': row['vendor__store_name'], 'count': 0}
+        )
+        vendor['count'] += count
+        conditions[row['condition']] = conditions.get(row['condition'], 0) + count
+        buckets[row['price_bucket']] += count
+
+    def by_count(options):
+        return sorted(options, key=lambda option: (-option['count'], option['name']))
+
+    return {
+        'total': total,
+        'categories': by_count(categories.values()),
+        'vendors': by_count(vendors.values()),
+        'conditions': [
+            {'value': value, 'name': CONDITION_LABELS.get(value, value), 'count': count}
+            for value, count in sorted(conditions.items(), key=lambda item: -item[1])
+        ],
+        'price_buckets': [
+            {
+                'min': str(lower),
+                # max_price filters inclusively, the bucket bound is exclusive
+                'max': str(upper - Decimal('0.01')) if upper is not None else '',
+                'name': _bucket_label(lower, upper),
+                'count': count,
+            }
+            for (lower, upper), count in zip(PRICE_BUCKETS, buckets)
+            if count
+        ],
+    }
+
+
+def facets_cache_key(filters):
+    normalized = json.dumps(filters, sort_keys=True, default=str)
+    digest = hashlib.md5(normalized.encode()).hexdigest()
+    return f'facets:{generation(FACETS_GENERATION)}:{digest}'
+
+
+def _with_links(facets, params):
+    """Add the query string that selects each option, keeping the other filters"""
+    def link(**changes):
+        query = QueryDict(mutable=True)
+        for name in (*FILTER_PARAMS, 'sort'):
+            if params.get(name):
+                query[name] = params[name]
+        for name, value in changes.items():
+            query[name] = value
+        return query.urlencode()
+
+    for option in facets['categories']:
+        option['query'] = link(category=option['slug'])
+    for option in facets['vendors']:
+        option['query'] = link(vendor=option['id'])
+    for option in facets['conditions']:
+        option['query'] = link(condition=option['value'])
+    for option in facets['price_buckets']:
+        option['query'] = link(min_price=option['min'], max_price=option['max'])
+    return facets
+
+
+def get_facets(params):
+    """Cached facet counts (with per-option links) for a search request's GET params"""
+    filters = normalize_filters(params)
+    key = facets_cache_key(filters)
+    facets = get_or_compute(key, lambda: compute_facets(filters), FACETS_TIMEOUT)
+    # links depend on the raw params (e.g. sort), so they are never cached
+    return _with_links(copy.deepcopy(facets), params)
+
+
+@events.subscribe(models=['products.Product', 'products.Category', 'vendors.Vendor'])
+def invalidate_facets(change_events):
+    bump_generation(FACETS_GENERATION)
+
+
+def search_facets_context(params):
+    """Template context for core/search_results.html: facets, facet_groups, total_results"""
+    facets = get_facets(params)
+    return {
+        'facets': facets,
+        'facet_groups': [
+            ('Category', facets['categories']),
+            ('Vendor', facets['vendors']),
+            ('Condition', facets['conditions']),
+            ('Price', facets['price_buckets']),
+        ],
+        'total_results': facets['total'],
+    }
@@ -0,0 +1,126 @@
+"""
+Precomputed home page content.
+
+The home page shows the featured products, the latest arrivals and a
+category grid, and its content changes far less often than it is viewed.
+build_home_feed() runs the three queries once and stores the results as
+plain card payloads (the product_card_rows() dicts and category rows) under
+a single cache key. The home view then renders from one cache read through
+home_feed_context(). A miss goes through core.cache.get_or_compute(), so
+a cold cache costs one build however many requests arrive together.
+
+The trending and most-viewed sections move with every popularity flush, so
+they are not part of the feed. home_feed_context() adds them from their
+own short-lived caches (products.popularity).
+
+The feed is rebuilt by a queued change-event subscriber when a product,
+image, category or vendor that can appear on the page changes, and by the
+refresh_home_feed command for cron-style scheduling.
+"""
+from dataclasses import dataclass
+
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils import timezone
+
+from core import events
+from core.cache import get_cached, get_or_compute, set_cached
+
+from .cards import product_card_rows, to_cards
+from .models import Category, Product, ProductImage
+from .popularity import most_viewed_cards, trending_cards
+
+HOME_FEED_CACHE_KEY = 'home-feed:v2'
+HOME_FEED_TIMEOUT = 60 * 60 * 6
+FEATURED_COUNT = 8
+LATEST_COUNT = 8
+CATEGORY_COUNT = 6
+TRENDING_COUNT = 4
+MOST_VIEWED_COUNT = 4
+
+
+@dataclass(slots=True, frozen=True)
+class CategoryTile:
+    id: int
+    name: str
+    slug: str
+    image: str | None
+
+    @property
+    def image_url(self):
+        return default_storage.url(self.image) if self.image else ''
+
+
+def query_home_feed():
+    active = Product.objects.filter(is_active=True)
+    feed = {
+        'featured': list(product_card_rows(active.filter(is_featured=True))[:FEATURED_COUNT]),
+        'latest': list(product_card_rows(active.order_by('-created_at'))[:LATEST_COUNT]),
+        'categories': list(
+            Category.objects.filter(is_active=True, parent__isnull=True)
+            .values('id', 'name', 'slug', 'image')[:CATEGORY_COUNT]
+        ),
+        'built_at': timezone.now(),
+    }
+    return feed
+
+
+def build_home_feed():
+    """Query and cache the home page payload; returns it"""
+    feed = query_home_feed()
+    set_cached(HOME_FEED_CACHE_KEY, feed, HOME_FEED_TIMEOUT)
+    return feed
+
+
+def get_home_feed():
+    return get_or_compute(HOME_FEED_CACHE_KEY, query_home_feed, HOME_FEED_TIMEOUT)
+
+
+def home_feed_context():
+    """Template context for core/home.html"""
+    feed = get_home_feed()
+    return {
+        'featured_products': to_cards(feed['featured']),
+        'latest_products': to_cards(feed['latest']),
+        'categories': [CategoryTile(**row) for row in feed['categories']],
+        'trending_products': trending_cards(limit=TRENDING_COUNT),
+        'most_viewed_products': most_viewed_cards(limit=MOST_VIEWED_COUNT),
+    }
+
+
+def _affects_feed(feed, event):
+    if event.model == 'products.Category':
+        return True
+    shown = feed['featured'] + feed['latest']
+    shown_ids = {row['id'] for row in shown}
+    if event.model == 'vendors.Vendor':
+        return any(row['vendor_id'] in event.pks for row in shown)
+    if event.model == 'products.ProductImage':
+        if event.action == events.DELETED:
+            # the image row is gone, so we can't tell whose it was
+            return True
+        return ProductImage.objects.filter(pk__in=event.pks, product_id__in=shown_ids).exists()
+    if shown_ids & event.pks:
+        return True
+    if event.action == events.DELETED:
+        return False
+    # a product not on the page only matters if it now qualifies for it
+    qualifies = Q(is_featured=True)
+    if len(feed['latest']) < LATEST_COUNT:
+        qualifies |= Q(pk__isnull=False)
+    elif feed['latest']:
+        qualifies |= Q(created_at__gte=Product.objects.filter(pk=feed['latest'][-1]['id']).values('created_at')[:1])
+    return Product.objects.filter(qualifies, pk__in=event.pks, is_active=True).exists()
+
+
+@events.subscribe(
+    models=['products.Product', 'products.ProductImage', 'products.Category', 'vendors.Vendor'],
+    queued=True,
+)
+def refresh_on_catalog_change(change_events):
+    feed = get_cached(HOME_FEED_CACHE_KEY)
+    if feed is None:
+        # built lazily on the next home page view
+        return
+    if any(_affects_feed(feed, event) for event in change_events):
+        build_home_feed()
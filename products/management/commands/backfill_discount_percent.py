@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.models import Product, compute_discount_percent
+
+
+class Command(BaseCommand):
+    help = 'fills in the stored discount_percent for existing products, in primary key chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_id = 0
+        scanned = 0
+        updated = 0
+        while True:
+            rows = list(
+                Product.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', 'price', 'compare_price', 'discount_percent')[:chunk_size]
+            )
+            if not rows:
+                break
+            changed = []
+            for product_id, price, compare_price, stored in rows:
+                discount = compute_discount_percent(price, compare_price)
+                if discount != stored:
+                    changed.append(Product(pk=product_id, discount_percent=discount))
+            if changed:
+                # one short transaction per chunk keeps row locks brief
+                with transaction.atomic():
+                    Product.objects.bulk_update(changed, ['discount_percent'])
+            scanned += len(rows)
+            updated += len(changed)
+            last_id = rows[-1][0]
+            self.stdout.write(f'  {scanned} scanned, {updated} updated (up to id {last_id})')
+        self.stdout.write(self.style.SUCCESS(f'Backfilled discount_percent: {updated} of {scanned} products changed'))
@@ -0,0 +1,98 @@
+import tracemalloc
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.benchmark import Stopwatch
+from products.batch import upsert_products
+from products.deletion import CascadeDeleter
+from products.models import Category, Product, ProductImage, ProductVariant, Review
+from vendors.models import Vendor
+
+BULK_SIZE = 2000
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'builds a vendor with N products (plus an image, a variant and a review each) and measures peak '
+        'python memory and time to delete it with Model.delete() and with the batched CascadeDeleter. '
+        'everything runs inside a transaction that is rolled back'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100000)
+        parser.add_argument('--batch-size', type=int, default=500, help='CascadeDeleter batch size')
+        parser.add_argument('--skip-collector', action='store_true',
+                            help='only measure the CascadeDeleter (the collector needs a lot of memory at 100k)')
+
+    def handle(self, *args, **options):
+        category = Category.objects.first()
+        if category is None:
+            raise CommandError('Need at least one category.')
+        try:
+            with transaction.atomic():
+                self._run(category, options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _build_vendor(self, label, category, count):
+        user = User.objects.create(username=f'benchmark-deletion-{label}')
+        vendor = Vendor.objects.create(user=user, store_name=f'Benchmark deletion {label}')
+        for start in range(0, count, BULK_SIZE):
+            upsert_products(vendor, [
+                {
+                    'sku': f'DEL-{label}-{n:07d}',
+                    'name': f'Deletion benchmark {n}',
+                    'description': 'Deletion benchmark',
+                    'price': Decimal('9.99'),
+                    'stock_quantity': 1,
+                    'category_id': category.pk,
+                }
+                for n in range(start, min(count, start + BULK_SIZE))
+            ])
+        product_ids = list(Product.objects.filter(vendor=vendor).values_list('pk', flat=True))
+        # file names that do not exist, so nothing real is touched on disk
+        ProductImage.objects.bulk_create(
+            [ProductImage(product_id=pk, image=f'benchmark-deletion/{label}-{pk}.jpg', is_primary=True)
+             for pk in product_ids],
+            batch_size=BULK_SIZE,
+        )
+        ProductVariant.objects.bulk_create(
+            [ProductVariant(product_id=pk, name='Size', value='M') for pk in product_ids],
+            batch_size=BULK_SIZE,
+        )
+        Review.objects.bulk_create(
+            [Review(product_id=pk, user=user, rating=5, comment='Benchmark') for pk in product_ids],
+            batch_size=BULK_SIZE,
+        )
+        return vendor
+
+    def _measure(self, label, delete):
+        tracemalloc.start()
+        with Stopwatch() as watch:
+            delete()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.stdout.write(f'  {label:<26} peak {peak / 1024 / 1024:>9.1f} MiB  {watch.elapsed:>8.2f}s')
+
+    def _run(self, category, options):
+        count = options['products']
+        self.stdout.write(f'{count} products per vendor, each with an image, a variant and a review')
+        if not options['skip_collector']:
+            vendor = self._build_vendor('collector', category, count)
+            self._measure('Model.delete() (before)', vendor.delete)
+
+        vendor = self._build_vendor('batched', category, count)
+        deleter = CascadeDeleter(batch_size=options['batch_size'], remove_files=False)
+        self._measure(
+            f'CascadeDeleter ({options["batch_size"]}/batch)',
+            lambda: deleter.delete(Vendor, Vendor.objects.filter(pk=vendor.pk)),
+        )
+        self.stdout.write('  rows deleted: ' + ', '.join(f'{label} {n}' for label, n in sorted(deleter.counts.items())))
@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.benchmark import Stopwatch
+from products.batch import sync_stock, upsert_products
+from products.models import Category, Product
+from vendors.models import Vendor
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'measures items/sec for an ERP sync: per-product save() vs the batch upsert and stock sync. '
+        'everything runs inside a transaction that is rolled back'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=5000)
+        parser.add_argument('--per-item-sample', type=int, default=500, help='products saved one by one for the baseline')
+        parser.add_argument('--vendor', type=int, help='vendor id (defaults to the first vendor)')
+
+    def handle(self, *args, **options):
+        vendor = Vendor.objects.filter(pk=options['vendor']).first() if options['vendor'] else Vendor.objects.first()
+        category = Category.objects.first()
+        if vendor is None or category is None:
+            raise CommandError('Need at least one vendor and one category.')
+        count = options['items']
+        items = [
+            {
+                'sku': f'BENCH-{vendor.pk}-{n:07d}',
+                'name': f'Benchmark product {n}',
+                'description': 'Benchmark product',
+                'price': Decimal('9.99'),
+                'stock_quantity': 10,
+                'category_id': category.pk,
+            }
+            for n in range(count)
+        ]
+        try:
+            with transaction.atomic():
+                self._run(vendor, category, items, options['per_item_sample'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _report(self, label, items, elapsed):
+        self.stdout.write(f'  {label:<22} {items:>7} items  {items / elapsed:>10.1f} items/s  {elapsed:>8.2f}s')
+
+    def _run(self, vendor, category, items, sample):
+        sample = min(sample, len(items))
+        with Stopwatch() as watch:
+            for item in items[:sample]:
+                fields = {key: value for key, value in item.items() if key not in ('sku', 'category_id')}
+                Product(vendor=vendor, category=category, sku=f"{item['sku']}-single", **fields).save()
+        self._report('per-item save()', sample, watch.elapsed)
+
+        with Stopwatch() as watch:
+            upsert_products(vendor, items)
+        self._report('batch upsert (create)', len(items), watch.elapsed)
+
+        for item in items:
+            item['price'] = Decimal('8.99')
+        with Stopwatch() as watch:
+            upsert_products(vendor, items)
+        self._report('batch upsert (update)', len(items), watch.elapsed)
+
+        stock = [{'sku': item['sku'], 'stock_quantity': 5} for item in items]
+        with Stopwatch() as watch:
+            sync_stock(vendor, stock)
+        self._report('stock sync', len(stock), watch.elapsed)
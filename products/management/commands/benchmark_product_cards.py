@@ -0,0 +1,48 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from products.cards import product_cards
+from products.models import Product
+
+
+def touch(products):
+    """read what a listing card reads so lazy lookups are counted too"""
+    for product in products:
+        (product.name, product.price, product.vendor_name, product.category_name,
+         product.image_url, product.discount_percentage, product.get_absolute_url())
+
+
+class Command(BaseCommand):
+    help = 'compares memory and time of full Product instances vs ProductCard rows for listing pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000, help='products per run')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        ids = list(Product.objects.filter(is_active=True).values_list('id', flat=True)[:options['count']])
+        if not ids:
+            raise CommandError('No active products to benchmark against.')
+
+        strategies = {
+            'model instances': lambda: list(
+                Product.objects.filter(id__in=ids).select_related('vendor', 'category').prefetch_related('images')
+            ),
+            'product cards': lambda: product_cards(Product.objects.filter(id__in=ids)),
+        }
+        per_thousand = 1000 / len(ids)
+        self.stdout.write(f'{len(ids)} products, {options["repeat"]} runs each (figures scaled to 1000 cards)')
+        for label, load in strategies.items():
+            timings = []
+            peaks = []
+            for _ in range(options['repeat']):
+                tracemalloc.start()
+                start = time.perf_counter()
+                touch(load())
+                timings.append(time.perf_counter() - start)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            best = min(timings) * per_thousand * 1000
+            peak = min(peaks) * per_thousand / 1024
+            self.stdout.write(f'  {label:<16} {best:>9.1f} ms   peak {peak:>9.1f} KiB')
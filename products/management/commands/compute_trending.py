@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from products.popularity import compute_trending
+
+
+class Command(BaseCommand):
+    help = 'recomputes the time-decayed trending score of every product from the hourly popularity buckets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--half-life-hours', type=float, default=24)
+        parser.add_argument('--window-days', type=int, default=7)
+        parser.add_argument('--retention-days', type=int, default=30, help='older hourly buckets are deleted')
+
+    def handle(self, *args, **options):
+        scored = compute_trending(
+            half_life_hours=options['half_life_hours'],
+            window_days=options['window_days'],
+            retention_days=options['retention_days'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Trending scores updated for {scored} products'))
@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router
+
+from products.cards import product_card_rows
+from products.models import Product
+
+
+def value_bytes(value):
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    return len(str(value).encode())
+
+
+class Command(BaseCommand):
+    help = (
+        'reports bytes and query time per listing page for full Product rows and card rows. '
+        'bytes are the encoded size of the values the database sends back'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--pages', type=int, default=5, help='pages measured, spread across the listing')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--explain', action='store_true', help='print the query plan of each mode for page 1')
+
+    def handle(self, *args, **options):
+        base = Product.objects.filter(is_active=True).order_by('-created_at')
+        total = base.count()
+        if not total:
+            raise CommandError('No active products to measure.')
+        page_size = options['page_size']
+        last_page = max(1, (total + page_size - 1) // page_size)
+        pages = sorted({1 + (last_page - 1) * i // max(1, options['pages'] - 1) for i in range(options['pages'])})
+
+        modes = {
+            'full rows (before)': base.select_related('vendor', 'category'),
+            'card rows': product_card_rows(base),
+        }
+        self.stdout.write(f'{total} active products, pages {pages} of {last_page}, {page_size} per page')
+        for label, queryset in modes.items():
+            if options['explain']:
+                self.stdout.write(f'-- {label}\n{queryset[:page_size].explain()}')
+            sizes = []
+            timings = []
+            for page in pages:
+                offset = (page - 1) * page_size
+                size, elapsed = self._measure(queryset[offset:offset + page_size], options['repeat'])
+                sizes.append(size)
+                timings.append(elapsed)
+            self.stdout.write(
+                f'  {label:<20} {sum(sizes) / len(sizes) / 1024:>9.1f} KiB/page  '
+                f'{sum(timings) / len(timings) * 1000:>8.2f} ms/page'
+            )
+
+    def _measure(self, queryset, repeat):
+        """Run the page's SQL directly so only the database round trip is timed"""
+        sql, params = queryset.query.sql_with_params()
+        connection = connections[router.db_for_read(Product)]
+        best = None
+        size = 0
+        with connection.cursor() as cursor:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            size = sum(value_bytes(value) for row in rows for value in row)
+        return size, best
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from products.sku import rebuild_sku_index
+
+
+class Command(BaseCommand):
+    help = 'rebuilds the sku lookup table used by integrations from products and variants'
+
+    def handle(self, *args, **options):
+        total = rebuild_sku_index()
+        self.stdout.write(self.style.SUCCESS(f'SKU index rebuilt with {total} entries.'))
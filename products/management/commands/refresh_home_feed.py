@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.home_feed import build_home_feed
+
+
+class Command(BaseCommand):
+    help = 'rebuilds the cached home page feed (featured, latest, categories); safe to run from cron'
+
+    def handle(self, *args, **options):
+        feed = build_home_feed()
+        self.stdout.write(self.style.SUCCESS(
+            f"Home feed rebuilt: {len(feed['featured'])} featured, {len(feed['latest'])} latest, "
+            f"{len(feed['categories'])} categories"
+        ))
@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from products.deletion import run_job
+from products.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = (
+        'runs pending vendor/category deletion jobs and resumes ones whose worker stopped reporting; '
+        'with --status only lists open jobs and their progress'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--status', action='store_true', help='list open jobs without running anything')
+        parser.add_argument('--stale-minutes', type=int, default=10,
+                            help='resume running jobs with no progress for this long')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='also rerun failed jobs, whose remaining catalog stays hidden until they finish')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            for job in DeletionJob.objects.open():
+                self.stdout.write(
+                    f'#{job.pk} {job.object_repr} [{job.model_label} {job.object_id}] {job.status} '
+                    f'{job.percent_done}% - {job.products_deleted}/{job.products_total} products, '
+                    f'{sum(job.rows_deleted.values())} rows, {job.files_deleted} files'
+                )
+            return
+
+        stale = timezone.now() - timedelta(minutes=options['stale_minutes'])
+        jobs = list(
+            DeletionJob.objects.filter(status=DeletionJob.PENDING).values_list('pk', flat=True)
+        ) + list(
+            DeletionJob.objects.filter(status=DeletionJob.RUNNING, updated_at__lt=stale).values_list('pk', flat=True)
+        )
+        if options['retry_failed']:
+            jobs += list(DeletionJob.objects.filter(status=DeletionJob.FAILED).values_list('pk', flat=True))
+        for job_id in jobs:
+            job = run_job(job_id, resume=True, retry_failed=options['retry_failed'])
+            if job is None:
+                continue
+            style = self.style.SUCCESS if job.status == DeletionJob.DONE else self.style.ERROR
+            self.stdout.write(style(
+                f'#{job.pk} {job.object_repr}: {job.status}, {sum(job.rows_deleted.values())} rows, '
+                f'{job.files_deleted} files{" - " + job.error if job.error else ""}'
+            ))
+        if not jobs:
+            self.stdout.write('No deletion jobs to run.')
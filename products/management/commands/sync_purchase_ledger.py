@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from products.purchases import check_ledger, rebuild_ledger
+
+
+class Command(BaseCommand):
+    help = 'backfills the verified purchase ledger from orders, or checks it with --check'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='only report differences between the ledger and the orders tables',
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            missing, extra = check_ledger()
+            if missing or extra:
+                raise CommandError(
+                    f'Purchase ledger is out of sync: {len(missing)} missing, {len(extra)} stale row(s). '
+                    'Run sync_purchase_ledger without --check to repair it.'
+                )
+            self.stdout.write(self.style.SUCCESS('Purchase ledger is consistent with orders.'))
+            return
+
+        added, removed = rebuild_ledger()
+        self.stdout.write(
+            self.style.SUCCESS(f'Purchase ledger synced: {added} row(s) added, {removed} removed.')
+        )
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:08
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Avg, Count
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    """Fill the stored rating aggregates from approved reviews"""
+    product_model = apps.get_model('products', 'Product')
+    review_model = apps.get_model('products', 'Review')
+
+    stats = review_model.objects.filter(is_approved=True).order_by().values('product_id').annotate(
+        avg_rating=Avg('rating'), count=Count('id')
+    )
+    products = [
+        product_model(pk=row['product_id'], rating_average=round(row['avg_rating'], 1), review_count=row['count'])
+        for row in stats
+    ]
+    product_model.objects.bulk_update(products, ['rating_average', 'review_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_auto_20250922_1543'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_average',
+            field=models.FloatField(default=0, help_text='Average of approved review ratings, kept in sync by moderation'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of approved reviews'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['is_approved', '-created_at', '-id'], name='review_queue_idx'),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
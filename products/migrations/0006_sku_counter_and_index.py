@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_sku_index(apps, schema_editor):
+    """Index the SKUs of existing products and variants"""
+    product_model = apps.get_model('products', 'Product')
+    variant_model = apps.get_model('products', 'ProductVariant')
+    index_model = apps.get_model('products', 'SkuIndex')
+
+    entries = [
+        index_model(sku=sku, product_id=product_id)
+        for product_id, sku in product_model.objects.exclude(sku='').values_list('id', 'sku')
+    ]
+    variants = variant_model.objects.exclude(sku_suffix='').values_list('id', 'product_id', 'product__sku', 'sku_suffix')
+    entries += [
+        index_model(sku=f"{product_sku}-{suffix}", product_id=product_id, variant_id=variant_id)
+        for variant_id, product_id, product_sku, suffix in variants
+    ]
+    index_model.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_purchaserecord'),
+        ('vendors', '0002_vendor_response_time_vendor_return_policy_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkuCounter',
+            fields=[
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sku_counter', serialize=False, to='vendors.vendor')),
+                ('next_value', models.PositiveBigIntegerField(default=1)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SkuIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sku', models.CharField(max_length=80, unique=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sku_entries', to='products.product')),
+                ('variant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sku_entries', to='products.productvariant')),
+            ],
+            options={
+                'verbose_name_plural': 'SKU index',
+            },
+        ),
+        migrations.RunPython(populate_sku_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_product_listing_indexes'),
+        ('vendors', '0002_vendor_response_time_vendor_return_policy_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='discount_percent',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Saving against compare price, kept in sync on save'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', '-discount_percent', '-created_at'], name='product_discount_listing_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_discount_percent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductPopularity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('cart_adds', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='popularity_buckets', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket_start'], name='popularity_bucket_idx')],
+                'unique_together': {('product', 'bucket_start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductTrending',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='products.product')),
+                ('score', models.FloatField(default=0)),
+                ('views', models.PositiveIntegerField(default=0, help_text='Views inside the scoring window')),
+                ('updated_at', models.DateTimeField()),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending_products', to='products.category')),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['category', '-score'], name='trending_category_score_idx'), models.Index(fields=['-score'], name='trending_score_idx')],
+            },
+        ),
+    ]
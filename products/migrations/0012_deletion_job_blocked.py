@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_media_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deletionjob',
+            name='hidden',
+            field=models.JSONField(blank=True, default=dict, help_text='What scheduling deactivated, restored when blocked'),
+        ),
+        migrations.AlterField(
+            model_name='deletionjob',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed'), ('blocked', 'Blocked (nothing deleted)')], default='pending', max_length=10),
+        ),
+    ]
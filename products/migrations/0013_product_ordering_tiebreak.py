@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_deletion_job_blocked'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='product',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+    ]
@@ -4,8 +4,6 @@ from django.urls import reverse
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
 from vendors.models import Vendor
-import time
-import uuid
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -27,10 +25,40 @@ class Category(models.Model):
     def get_absolute_url(self):
         return reverse('products:category', kwargs={'slug': self.slug})
 
+    @property
+    def image_url(self):
+        return self.image.url if self.image else ''
+
     class Meta:
         verbose_name_plural = "Categories"
         ordering = ['name']
 
+def compute_discount_percent(price, compare_price):
+    """Whole-percent saving against the compare-at price (0 when not on sale)"""
+    if compare_price and price is not None and compare_price > price:
+        return int(((compare_price - price) / compare_price) * 100)
+    return 0
+
+class ProductQuerySet(models.QuerySet):
+    # ?sort= values of the listing and search pages. Every ordering ends on the
+    # unique id so OFFSET pages of equal prices/names/timestamps don't overlap
+    SORT_ORDERINGS = {
+        'price_low': ('price', '-id'),
+        'price_high': ('-price', '-id'),
+        'name': ('name', '-id'),
+        'created': ('-created_at', '-id'),
+        'created_at': ('-created_at', '-id'),
+        'discount': ('-discount_percent', '-created_at', '-id'),
+    }
+
+    def on_sale(self):
+        return self.filter(discount_percent__gt=0)
+
+    def sorted_by(self, sort):
+        """Apply a listing sort option; unknown options keep the current ordering"""
+        ordering = self.SORT_ORDERINGS.get(sort)
+        return self.order_by(*ordering) if ordering else self
+
 class Product(models.Model):
     CONDITION_CHOICES = [
         ('new', 'New'),
@@ -57,19 +85,26 @@ class Product(models.Model):
     is_featured = models.BooleanField(default=False)
     meta_title = models.CharField(max_length=200, blank=True)
     meta_description = models.CharField(max_length=300, blank=True)
+    rating_average = models.FloatField(default=0, help_text="Average of approved review ratings, kept in sync by moderation")
+    review_count = models.PositiveIntegerField(default=0, help_text="Number of approved reviews")
+    discount_percent = models.PositiveSmallIntegerField(default=0, help_text="Saving against compare price, kept in sync on save")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
+        self.discount_percent = compute_discount_percent(self.price, self.compare_price)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'price', 'compare_price'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'discount_percent'}
         if not self.slug:
             base_slug = slugify(f"{self.name}-{self.vendor.store_name}")
             self.slug = self._generate_unique_slug(base_slug)
         if not self.sku:
-            # make a unique sku using timestamp and random stuff
-            timestamp = int(time.time())
-            random_part = str(uuid.uuid4())[:8]
-            vendor_prefix = str(self.vendor.id).zfill(3)
-            self.sku = f"{vendor_prefix}-{timestamp}-{random_part}"
+            # sequential per-vendor sku from the vendor's counter row
+            from .sku import allocate_skus
+            self.sku = allocate_skus(self.vendor_id, 1)[0]
         super().save(*args, **kwargs)
 
     def _generate_unique_slug(self, base_slug):
@@ -95,23 +130,32 @@ class Product(models.Model):
 
     @property
     def discount_percentage(self):
-        if self.compare_price and self.compare_price > self.price:
-            return int(((self.compare_price - self.price) / self.compare_price) * 100)
-        return 0
+        return compute_discount_percent(self.price, self.compare_price)
+
+    @property
+    def vendor_name(self):
+        return self.vendor.store_name
+
+    @property
+    def category_name(self):
+        return self.category.name
+
+    @property
+    def image_url(self):
+        """URL of the primary image (or the first one); uses prefetched images when present"""
+        images = list(self.images.all())
+        image = next((img for img in images if img.is_primary), images[0] if images else None)
+        return image.image.url if image else ''
 
     @property
     def average_rating(self):
-        """Calculate average rating from all approved reviews"""
-        reviews = self.reviews.filter(is_approved=True)
-        if reviews.exists():
-            total_rating = sum(review.rating for review in reviews)
-            return round(total_rating / reviews.count(), 1)
-        return 0
+        """Average rating of approved reviews (stored aggregate)"""
+        return self.rating_average
 
     @property
     def total_reviews(self):
-        """Count of all approved reviews"""
-        return self.reviews.filter(is_approved=True).count()
+        """Count of all approved reviews (stored aggregate)"""
+        return self.review_count
 
     @property
     def verified_reviews_count(self):
@@ -123,7 +167,15 @@ class Product(models.Model):
         return self.reviews.filter(is_approved=True, rating=rating)
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # filter + order of the busy listings: all products, category, storefront, featured
+            models.Index(fields=['is_active', '-created_at'], name='product_listing_idx'),
+            models.Index(fields=['category', 'is_active', '-created_at'], name='product_category_listing_idx'),
+            models.Index(fields=['vendor', 'is_active', '-created_at'], name='product_vendor_listing_idx'),
+            models.Index(fields=['is_featured', 'is_active', '-created_at'], name='product_featured_listing_idx'),
+            models.Index(fields=['is_active', '-discount_percent', '-created_at'], name='product_discount_listing_idx'),
+        ]
 
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
@@ -149,6 +201,13 @@ class ProductVariant(models.Model):
     def __str__(self):
         return f"{self.product.name} - {self.name}: {self.value}"
 
+    @property
+    def sku(self):
+        """Full variant SKU: the product SKU plus this variant's suffix"""
+        if not self.sku_suffix:
+            return ''
+        return f"{self.product.sku}-{self.sku_suffix}"
+
     class Meta:
         unique_together = ['product', 'name', 'value']
 
@@ -172,13 +231,9 @@ class Review(models.Model):
     def save(self, *args, **kwargs):
         # Check if user has purchased this product to set verification status
         if not self.pk:  # Only check on creation
-            from orders.models import OrderItem
-            has_purchased = OrderItem.objects.filter(
-                order__user=self.user,
-                product=self.product,
-                order__status__in=['delivered', 'completed']
+            self.is_verified = PurchaseRecord.objects.filter(
+                user_id=self.user_id, product_id=self.product_id
             ).exists()
-            self.is_verified = has_purchased
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -193,3 +248,165 @@ class Review(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['user', 'product']  # Ensure one review per user per product
+        indexes = [
+            # keyset pagination for the moderation queue
+            models.Index(fields=['is_approved', '-created_at', '-id'], name='review_queue_idx'),
+        ]
+
+
+class PurchaseRecord(models.Model):
+    """One row per (user, product) with a delivered or completed order.
+
+    Maintained from order status changes (see products.purchases) so the
+    verified-purchase check is a single unique-index lookup.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='purchase_records')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='purchase_records')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user_id} purchased {self.product_id}"
+
+    class Meta:
+        unique_together = ['user', 'product']
+
+
+class SkuCounter(models.Model):
+    """Next free SKU number per vendor; handed out in blocks by products.sku"""
+    vendor = models.OneToOneField(Vendor, on_delete=models.CASCADE, primary_key=True, related_name='sku_counter')
+    next_value = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.vendor_id}: {self.next_value}"
+
+
+class SkuIndex(models.Model):
+    """Unified SKU lookup covering products and their variants"""
+    sku = models.CharField(max_length=80, unique=True)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='sku_entries')
+    variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, blank=True, null=True, related_name='sku_entries')
+
+    def __str__(self):
+        return self.sku
+
+    class Meta:
+        verbose_name_plural = "SKU index"
+
+
+class ProductPopularity(models.Model):
+    """Views and cart adds per product per hour, written in batches by products.popularity"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='popularity_buckets')
+    bucket_start = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+    cart_adds = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.bucket_start:%Y-%m-%d %H:00}"
+
+    class Meta:
+        unique_together = ['product', 'bucket_start']
+        indexes = [
+            models.Index(fields=['bucket_start'], name='popularity_bucket_idx'),
+        ]
+
+
+class ProductTrending(models.Model):
+    """Time-decayed popularity score per product, recomputed by compute_trending"""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='trending_products')
+    score = models.FloatField(default=0)
+    views = models.PositiveIntegerField(default=0, help_text="Views inside the scoring window")
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.product_id}: {self.score:.2f}"
+
+    class Meta:
+        ordering = ['-score']
+        indexes = [
+            # top-N trending per category
+            models.Index(fields=['category', '-score'], name='trending_category_score_idx'),
+            models.Index(fields=['-score'], name='trending_score_idx'),
+        ]
+
+
+class DeletionJobQuerySet(models.QuerySet):
+    def open(self):
+        return self.filter(status__in=[DeletionJob.PENDING, DeletionJob.RUNNING])
+
+    def pending_ids(self, model):
+        """object ids of ``model`` rows hidden for deletion: queued, running or failed part-way (usable as a subquery)"""
+        return (
+            self.exclude(status__in=[DeletionJob.DONE, DeletionJob.BLOCKED])
+            .filter(model_label=model._meta.label)
+            .values('object_id')
+        )
+
+
+class DeletionJob(models.Model):
+    """Background cascade deletion of a vendor or category, run in batches by products.deletion"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    BLOCKED = 'blocked'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+        (BLOCKED, 'Blocked (nothing deleted)'),
+    ]
+
+    model_label = models.CharField(max_length=100)
+    object_id = models.PositiveBigIntegerField()
+    object_repr = models.CharField(max_length=200)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    products_total = models.PositiveIntegerField(default=0, help_text="Products to delete, counted when scheduled")
+    products_deleted = models.PositiveIntegerField(default=0)
+    rows_deleted = models.JSONField(default=dict, blank=True, help_text="Deleted rows per model")
+    files_deleted = models.PositiveIntegerField(default=0)
+    hidden = models.JSONField(default=dict, blank=True, help_text="What scheduling deactivated, restored when blocked")
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    objects = DeletionJobQuerySet.as_manager()
+
+    def __str__(self):
+        return f"Delete {self.model_label} {self.object_id} ({self.status})"
+
+    @property
+    def percent_done(self):
+        if self.status == self.DONE:
+            return 100
+        if not self.products_total:
+            return 0
+        return min(99, self.products_deleted * 100 // self.products_total)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['model_label', 'status'], name='deletion_job_status_idx'),
+        ]
+
+
+class MediaBlob(models.Model):
+    """One stored file of core.storage.ContentAddressedStorage, shared by every field that uploaded the same bytes"""
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True, help_text="Last upload or reference change")
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count', 'last_used_at'], name='media_blob_gc_idx'),
+        ]
@@ -0,0 +1,97 @@
+"""
+Bulk review moderation.
+
+Everything here works on querysets so a spam wave is handled with a single
+UPDATE instead of one save per review. The rating aggregates stored on
+Product are recomputed afterwards for the affected products in one grouped
+query. update() and bulk_update() bypass model signals, so the affected
+reviews and products are announced on the change-event bus explicitly, as
+one coalesced event each.
+"""
+import re
+
+from django.db import transaction
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+
+from core import events
+
+from .models import Product, Review
+
+AGGREGATE_BATCH_SIZE = 500
+# regexes run against every review row in the database; keep them short
+MAX_PATTERN_LENGTH = 200
+
+
+def recompute_rating_aggregates(product_ids):
+    """Refresh rating_average/review_count for the given products"""
+    product_ids = list(set(product_ids))
+    for start in range(0, len(product_ids), AGGREGATE_BATCH_SIZE):
+        chunk = product_ids[start:start + AGGREGATE_BATCH_SIZE]
+        stats = {
+            row['product_id']: row
+            for row in Review.objects.filter(product_id__in=chunk, is_approved=True)
+            .order_by()
+            .values('product_id')
+            .annotate(avg_rating=Avg('rating'), count=Count('id'))
+        }
+        products = []
+        for product_id in chunk:
+            row = stats.get(product_id)
+            products.append(Product(
+                pk=product_id,
+                rating_average=round(row['avg_rating'], 1) if row else 0,
+                review_count=row['count'] if row else 0,
+            ))
+        Product.objects.bulk_update(products, ['rating_average', 'review_count'])
+    events.publish(Product, product_ids)
+    return len(product_ids)
+
+
+def set_review_approval(queryset, approved):
+    """Approve or reject every review in the queryset with one UPDATE.
+
+    Returns the number of reviews whose status actually changed.
+    """
+    changing = queryset.exclude(is_approved=approved)
+    with transaction.atomic():
+        rows = list(changing.order_by().values_list('pk', 'product_id'))
+        if not rows:
+            return 0
+        review_ids = [pk for pk, _ in rows]
+        updated = Review.objects.filter(pk__in=review_ids).update(
+            is_approved=approved, updated_at=timezone.now()
+        )
+        events.publish(Review, review_ids)
+        recompute_rating_aggregates({product_id for _, product_id in rows})
+    return updated
+
+
+def moderate_user_reviews(user_ids, approved):
+    """Approve or reject everything written by the given users"""
+    return set_review_approval(Review.objects.filter(user_id__in=user_ids), approved)
+
+
+def pattern_error(pattern, regex=False):
+    """Why ``pattern`` can't be used for moderate_matching_reviews(), or None when it can"""
+    if len(pattern) > MAX_PATTERN_LENGTH:
+        return f'Patterns are limited to {MAX_PATTERN_LENGTH} characters.'
+    if regex:
+        try:
+            re.compile(pattern)
+        except re.error as exc:
+            return f'Invalid regular expression: {exc}.'
+    return None
+
+
+def moderate_matching_reviews(pattern, approved, regex=False, queryset=None):
+    """Approve or reject reviews whose title or comment matches a pattern"""
+    if not pattern:
+        return 0
+    lookup = 'iregex' if regex else 'icontains'
+    if queryset is None:
+        queryset = Review.objects.all()
+    matches = queryset.filter(
+        Q(**{f'title__{lookup}': pattern}) | Q(**{f'comment__{lookup}': pattern})
+    )
+    return set_review_approval(matches, approved)
@@ -0,0 +1,226 @@
+"""
+Product popularity: write-behind view/cart counters and trending scores.
+
+Detail page views and cart adds are counted in process memory per product
+and hour. No database write happens on the request path. Every
+POPULARITY_FLUSH_SECONDS (checked when a request finishes) the pending counts
+are written to ProductPopularity with one batched upsert that adds to the
+stored hour bucket.
+
+compute_trending() turns the recent buckets into a time-decayed score per
+product. Each hour's weight halves every ``half_life_hours``, and all the
+weights go into one grouped SQL aggregate. The scores are stored in
+ProductTrending, whose (category, -score) index serves the top-N queries
+below.
+
+The home page shows the overall trending and most-viewed sections, and
+each category page shows its own top trending products. They read through
+trending_cards() and most_viewed_cards(), which cache the card rows. Every
+compute_trending() run bumps the 'trending' generation, so fresh scores
+show up right away.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connections, router, transaction
+from django.db.models import Case, F, FloatField, Sum, Value, When
+from django.utils import timezone
+
+from core.cache import bump_generation, generation, get_or_compute
+
+from .cards import product_card_rows, to_cards
+from .models import Product, ProductPopularity, ProductTrending
+
+logger = logging.getLogger(__name__)
+
+UPSERT_BATCH_SIZE = 500
+TRENDING_BATCH_SIZE = 1000
+CART_ADD_WEIGHT = 5  # one cart add counts like this many views
+SECTIONS_TIMEOUT = 60 * 10
+
+_pending = Counter()  # (product_id, bucket_start, field) -> count
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def bucket_for(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _record(product_id, field, amount):
+    key = (product_id, bucket_for(timezone.now()), field)
+    with _lock:
+        _pending[key] += amount
+
+
+def record_view(product_id):
+    _record(product_id, 'views', 1)
+
+
+def record_cart_add(product_id, quantity=1):
+    _record(product_id, 'cart_adds', max(1, quantity))
+
+
+def flush_if_due(**kwargs):
+    """request_finished receiver: flush when the interval has passed or the buffer is large"""
+    interval = getattr(settings, 'POPULARITY_FLUSH_SECONDS', 30)
+    max_pending = getattr(settings, 'POPULARITY_MAX_PENDING', 5000)
+    if _pending and (time.monotonic() - _last_flush >= interval or len(_pending) >= max_pending):
+        flush()
+
+
+def flush():
+    """Write every pending count to the database; returns the number of buckets touched"""
+    global _last_flush
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not pending:
+        return 0
+
+    rows = {}
+    for (product_id, bucket_start, field), count in pending.items():
+        row = rows.setdefault((product_id, bucket_start), {'views': 0, 'cart_adds': 0})
+        row[field] += count
+    try:
+        upsert_counts(rows)
+    except DatabaseError:
+        logger.exception('Popularity flush failed; keeping %d counts for the next attempt', len(pending))
+        with _lock:
+            _pending.update(pending)
+        return 0
+    return len(rows)
+
+
+def _upsert_sql(connection):
+    qn = connection.ops.quote_name
+    table = qn(ProductPopularity._meta.db_table)
+    views, cart_adds = qn('views'), qn('cart_adds')
+    insert = (
+        f"INSERT INTO {table} ({qn('product_id')}, {qn('bucket_start')}, {views}, {cart_adds}) "
+        "VALUES (%s, %s, %s, %s) "
+    )
+    if connection.vendor == 'mysql':
+        return insert + (
+            f"ON DUPLICATE KEY UPDATE {views} = {views} + VALUES({views}), "
+            f"{cart_adds} = {cart_adds} + VALUES({cart_adds})"
+        )
+    # sqlite and postgresql
+    return insert + (
+        f"ON CONFLICT ({qn('product_id')}, {qn('bucket_start')}) DO UPDATE SET "
+        f"{views} = {table}.{views} + excluded.{views}, "
+        f"{cart_adds} = {table}.{cart_adds} + excluded.{cart_adds}"
+    )
+
+
+def upsert_counts(rows):
+    """Add {(product_id, bucket_start): {'views', 'cart_adds'}} onto the stored buckets"""
+    alias = router.db_for_write(ProductPopularity)
+    connection = connections[alias]
+    existing = set(
+        Product.objects.using(alias)
+        .filter(pk__in={product_id for product_id, _ in rows})
+        .values_list('pk', flat=True)
+    )
+    params = [
+        (product_id, connection.ops.adapt_datetimefield_value(bucket_start), row['views'], row['cart_adds'])
+        for (product_id, bucket_start), row in rows.items()
+        if product_id in existing
+    ]
+    sql = _upsert_sql(connection)
+    with transaction.atomic(using=alias), connection.cursor() as cursor:
+        for start in range(0, len(params), UPSERT_BATCH_SIZE):
+            cursor.executemany(sql, params[start:start + UPSERT_BATCH_SIZE])
+    return len(params)
+
+
+def compute_trending(half_life_hours=24, window_days=7, retention_days=30):
+    """Recompute ProductTrending from the popularity buckets; returns the number of scored products"""
+    now = timezone.now()
+    since = bucket_for(now) - timedelta(days=window_days)
+    ProductPopularity.objects.filter(bucket_start__lt=now - timedelta(days=retention_days)).delete()
+
+    recent = ProductPopularity.objects.filter(bucket_start__gte=since, product__is_active=True)
+    buckets = recent.order_by().values_list('bucket_start', flat=True).distinct()
+    weight = Case(
+        *[
+            When(bucket_start=bucket, then=Value(0.5 ** ((now - bucket).total_seconds() / 3600 / half_life_hours)))
+            for bucket in buckets
+        ],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    rows = (
+        recent.order_by()
+        .values('product_id', 'product__category_id')
+        .annotate(
+            score=Sum((F('views') + F('cart_adds') * CART_ADD_WEIGHT) * weight, output_field=FloatField()),
+            window_views=Sum('views'),
+        )
+    )
+    scores = [
+        ProductTrending(
+            product_id=row['product_id'],
+            category_id=row['product__category_id'],
+            score=row['score'] or 0,
+            views=row['window_views'] or 0,
+            updated_at=now,
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        ProductTrending.objects.bulk_create(
+            scores,
+            batch_size=TRENDING_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['product'],
+            update_fields=['category', 'score', 'views', 'updated_at'],
+        )
+        # products with no activity left in the window drop out
+        ProductTrending.objects.filter(updated_at__lt=now).delete()
+    transaction.on_commit(lambda: bump_generation('trending'))
+    return len(scores)
+
+
+def _rows_in_order(product_ids):
+    rows = {row['id']: row for row in product_card_rows(Product.objects.filter(pk__in=product_ids))}
+    return [rows[pk] for pk in product_ids if pk in rows]
+
+
+def trending_products(category_id=None, limit=8):
+    """Card rows for the top trending products, overall or within one category"""
+    trending = ProductTrending.objects.filter(product__is_active=True)
+    if category_id is not None:
+        trending = trending.filter(category_id=category_id)
+    return _rows_in_order(list(trending.order_by('-score').values_list('product_id', flat=True)[:limit]))
+
+
+def most_viewed(days=7, limit=8):
+    """Card rows for the products with the most detail views over the last ``days``"""
+    since = timezone.now() - timedelta(days=days)
+    product_ids = list(
+        ProductPopularity.objects.filter(bucket_start__gte=since, product__is_active=True)
+        .order_by()
+        .values('product_id')
+        .annotate(total=Sum('views'))
+        .order_by('-total')
+        .values_list('product_id', flat=True)[:limit]
+    )
+    return _rows_in_order(product_ids)
+
+
+def trending_cards(category_id=None, limit=8):
+    scope = 'all' if category_id is None else category_id
+    key = f"trending:{generation('trending')}:{scope}:{limit}"
+    return to_cards(get_or_compute(key, lambda: trending_products(category_id, limit), SECTIONS_TIMEOUT))
+
+
+def most_viewed_cards(days=7, limit=8):
+    # the view counters are flushed continuously, so this one simply expires
+    key = f'most-viewed:{days}:{limit}'
+    return to_cards(get_or_compute(key, lambda: most_viewed(days, limit), SECTIONS_TIMEOUT))
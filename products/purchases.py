@@ -0,0 +1,103 @@
+"""
+Purchase ledger behind the "verified purchase" badge.
+
+PurchaseRecord holds one row per (user, product) pair that has at least one
+delivered or completed order. Order signals keep it current, and
+sync_purchase_ledger backfills or checks it against the orders tables.
+"""
+from django.apps import apps
+from django.db import transaction
+
+from .models import PurchaseRecord
+
+QUALIFYING_STATUSES = ('delivered', 'completed')
+LEDGER_BATCH_SIZE = 1000
+
+
+def _order_item_model():
+    return apps.get_model('orders', 'OrderItem')
+
+
+def has_purchased(user_id, product_id):
+    """True when the user has a delivered/completed order for the product"""
+    if not user_id:
+        return False
+    return PurchaseRecord.objects.filter(user_id=user_id, product_id=product_id).exists()
+
+
+async def ahas_purchased(user_id, product_id):
+    """Async variant of has_purchased for the ASGI views"""
+    if not user_id:
+        return False
+    return await PurchaseRecord.objects.filter(user_id=user_id, product_id=product_id).aexists()
+
+
+def sync_user_products(user_id, product_ids):
+    """Bring the ledger rows for one user and a set of products in line with their orders"""
+    product_ids = set(product_ids)
+    if not user_id or not product_ids:
+        return
+    qualifying = set(
+        _order_item_model().objects.filter(
+            order__user_id=user_id,
+            product_id__in=product_ids,
+            order__status__in=QUALIFYING_STATUSES,
+        ).values_list('product_id', flat=True).distinct()
+    )
+    with transaction.atomic():
+        if qualifying:
+            PurchaseRecord.objects.bulk_create(
+                [PurchaseRecord(user_id=user_id, product_id=product_id) for product_id in qualifying],
+                ignore_conflicts=True,
+            )
+        stale = product_ids - qualifying
+        if stale:
+            PurchaseRecord.objects.filter(user_id=user_id, product_id__in=stale).delete()
+
+
+def sync_order(order):
+    """Update the ledger for every product on an order after a status change"""
+    product_ids = _order_item_model().objects.filter(order=order).values_list('product_id', flat=True)
+    sync_user_products(order.user_id, product_ids)
+
+
+def expected_pairs():
+    """(user_id, product_id) pairs the orders tables say belong in the ledger"""
+    return set(
+        _order_item_model().objects.filter(order__status__in=QUALIFYING_STATUSES)
+        .order_by()
+        .values_list('order__user_id', 'product_id')
+        .distinct()
+        .iterator(chunk_size=LEDGER_BATCH_SIZE)
+    )
+
+
+def ledger_pairs():
+    return set(
+        PurchaseRecord.objects.order_by().values_list('user_id', 'product_id').iterator(chunk_size=LEDGER_BATCH_SIZE)
+    )
+
+
+def check_ledger():
+    """Return (missing, extra) pairs compared to the orders tables"""
+    expected = expected_pairs()
+    actual = ledger_pairs()
+    return expected - actual, actual - expected
+
+
+def rebuild_ledger():
+    """Insert missing ledger rows and drop ones no longer backed by an order"""
+    missing, extra = check_ledger()
+    missing = list(missing)
+    for start in range(0, len(missing), LEDGER_BATCH_SIZE):
+        PurchaseRecord.objects.bulk_create(
+            [PurchaseRecord(user_id=user_id, product_id=product_id)
+             for user_id, product_id in missing[start:start + LEDGER_BATCH_SIZE]],
+            ignore_conflicts=True,
+        )
+    extra_by_user = {}
+    for user_id, product_id in extra:
+        extra_by_user.setdefault(user_id, []).append(product_id)
+    for user_id, product_ids in extra_by_user.items():
+        PurchaseRecord.objects.filter(user_id=user_id, product_id__in=product_ids).delete()
+    return len(missing), len(extra)
@@ -0,0 +1,66 @@
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core import events
+
+from .models import Category, Product, ProductImage, ProductVariant, Review
+from . import popularity, purchases, sku
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def refresh_product_rating(sender, instance, **kwargs):
+    """keep the stored rating aggregates in step with single review edits"""
+    from .moderation import recompute_rating_aggregates
+    recompute_rating_aggregates([instance.product_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_save, sender=Review)
+def publish_catalog_save(sender, instance, **kwargs):
+    events.publish(sender, [instance.pk], events.SAVED, using=kwargs.get('using'))
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_delete, sender=ProductVariant)
+@receiver(post_delete, sender=Review)
+def publish_catalog_delete(sender, instance, **kwargs):
+    events.publish(sender, [instance.pk], events.DELETED, using=kwargs.get('using'))
+
+
+@receiver(post_save, sender=Product)
+def index_product_sku(sender, instance, **kwargs):
+    sku.index_product(instance)
+
+
+@receiver(post_save, sender=ProductVariant)
+def index_variant_sku(sender, instance, **kwargs):
+    sku.index_variant(instance)
+
+
+@receiver(post_save, sender='orders.Order')
+def sync_purchase_ledger_for_order(sender, instance, **kwargs):
+    """order status changed - refresh the verified purchase ledger"""
+    purchases.sync_order(instance)
+
+
+@receiver(post_save, sender='orders.OrderItem')
+@receiver(post_delete, sender='orders.OrderItem')
+def sync_purchase_ledger_for_item(sender, instance, **kwargs):
+    order = instance.order
+    purchases.sync_user_products(order.user_id, [instance.product_id])
+
+
+@receiver(post_save, sender='orders.CartItem')
+def count_cart_add(sender, instance, created, **kwargs):
+    if created:
+        popularity.record_cart_add(instance.product_id, instance.quantity)
+
+
+request_finished.connect(popularity.flush_if_due, dispatch_uid='products_popularity_flush')
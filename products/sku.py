@@ -0,0 +1,98 @@
+"""
+SKU allocation and lookup.
+
+Each vendor has a SkuCounter row. A batch of new products takes a block of
+sequential numbers from it with one row update, so bulk imports don't pay a
+counter round trip per product. SkuIndex maps every product and variant SKU
+to its rows, so integrations can resolve hundreds of SKUs with one query.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Product, ProductVariant, SkuCounter, SkuIndex
+
+SKU_RESOLVE_FIELDS = (
+    'sku', 'product_id', 'variant_id',
+    'product__name', 'product__slug', 'product__price', 'product__stock_quantity', 'product__is_active',
+    'variant__name', 'variant__value', 'variant__price_adjustment', 'variant__stock_quantity',
+)
+
+
+def format_sku(vendor_id, number):
+    return f"{str(vendor_id).zfill(3)}-{str(number).zfill(6)}"
+
+
+def allocate_skus(vendor_id, count):
+    """Reserve ``count`` sequential SKUs for a vendor with a single counter update"""
+    if count < 1:
+        return []
+    with transaction.atomic():
+        counter, _ = SkuCounter.objects.select_for_update().get_or_create(vendor_id=vendor_id)
+        start = counter.next_value
+        SkuCounter.objects.filter(pk=vendor_id).update(next_value=F('next_value') + count)
+    return [format_sku(vendor_id, number) for number in range(start, start + count)]
+
+
+def assign_skus(products):
+    """Fill in missing SKUs on unsaved products, one block per vendor"""
+    by_vendor = defaultdict(list)
+    for product in products:
+        if not product.sku:
+            by_vendor[product.vendor_id].append(product)
+    for vendor_id, vendor_products in by_vendor.items():
+        for product, sku in zip(vendor_products, allocate_skus(vendor_id, len(vendor_products))):
+            product.sku = sku
+    return products
+
+
+def index_product(product):
+    """Point the product's SKU at it in the lookup table"""
+    stale, _ = SkuIndex.objects.filter(product=product, variant__isnull=True).exclude(sku=product.sku).delete()
+    if product.sku:
+        SkuIndex.objects.update_or_create(sku=product.sku, defaults={'product': product, 'variant': None})
+    if stale:
+        # variant SKUs embed the product SKU, so they moved too
+        for variant in product.variants.exclude(sku_suffix=''):
+            variant.product = product
+            index_variant(variant)
+
+
+def index_variant(variant):
+    SkuIndex.objects.filter(variant=variant).exclude(sku=variant.sku).delete()
+    if variant.sku:
+        SkuIndex.objects.update_or_create(
+            sku=variant.sku, defaults={'product_id': variant.product_id, 'variant': variant}
+        )
+
+
+def rebuild_sku_index(batch_size=1000):
+    """Regenerate the whole lookup table from products and variants"""
+    with transaction.atomic():
+        SkuIndex.objects.all().delete()
+        entries = []
+        for product_id, sku in Product.objects.exclude(sku='').values_list('id', 'sku').iterator(chunk_size=batch_size):
+            entries.append(SkuIndex(sku=sku, product_id=product_id))
+            if len(entries) >= batch_size:
+                SkuIndex.objects.bulk_create(entries, ignore_conflicts=True)
+                entries = []
+        variants = ProductVariant.objects.exclude(sku_suffix='').values_list('id', 'product_id', 'product__sku', 'sku_suffix')
+        for variant_id, product_id, product_sku, suffix in variants.iterator(chunk_size=batch_size):
+            entries.append(SkuIndex(sku=f"{product_sku}-{suffix}", product_id=product_id, variant_id=variant_id))
+            if len(entries) >= batch_size:
+                SkuIndex.objects.bulk_create(entries, ignore_conflicts=True)
+                entries = []
+        SkuIndex.objects.bulk_create(entries, ignore_conflicts=True)
+    return SkuIndex.objects.count()
+
+
+def resolve_skus(skus, vendor_id=None, active_only=False):
+    """Look up many SKUs at once; unknown SKUs (and ones outside the vendor / active filter) map to None"""
+    entries = SkuIndex.objects.filter(sku__in=set(skus))
+    if vendor_id is not None:
+        entries = entries.filter(product__vendor_id=vendor_id)
+    if active_only:
+        entries = entries.filter(product__is_active=True)
+    found = {row['sku']: row for row in entries.values(*SKU_RESOLVE_FIELDS)}
+    return {sku: found.get(sku) for sku in skus}
@@ -1,24 +1,59 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
-from django.urls import reverse_lazy
-from django.core.paginator import Paginator
+from django.urls import reverse, reverse_lazy
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models import Count, Q
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
 from core.twitter_utils import post_to_twitter, generate_new_product_tweet
 from .models import Product, Category, Review, ProductImage
 from .forms import ReviewForm, ProductForm
+from .moderation import moderate_matching_reviews, pattern_error, set_review_approval
+from .popularity import record_view, trending_cards
+from .purchases import ahas_purchased, has_purchased
+from .cards import cached_card_rows, product_card_rows, to_cards
+from core.async_utils import alist
+
+def listing_products(params):
+    """Active products narrowed and ordered by the listing's GET options"""
+    products = Product.objects.filter(is_active=True)
+    if params.get('category'):
+        products = products.filter(category__slug=params['category'])
+    if params.get('on_sale'):
+        products = products.on_sale()
+    return products.sorted_by(params.get('sort'))
+
+
+def listing_query(params):
+    """The listing's GET options without the page number, for building pagination links"""
+    params = params.copy()
+    params.pop('page', None)
+    return params.urlencode()
 
 class ProductListView(ListView):
     model = Product
+    use_read_replica = True
     template_name = 'products/list.html'
     context_object_name = 'products'
     paginate_by = 20
     
     def get_queryset(self):
-        return Product.objects.filter(is_active=True)
+        return product_card_rows(listing_products(self.request.GET))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['products'] = to_cards(context['object_list'])
+        context['page_query'] = listing_query(self.request.GET)
+        return context
 
 class ProductDetailView(DetailView):
     model = Product
+    use_read_replica = True
     template_name = 'products/detail.html'
     context_object_name = 'product'
     slug_field = 'slug'
@@ -26,11 +61,8 @@ class ProductDetailView(DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['related_products'] = Product.objects.filter(
-            category=self.object.category,
-            is_active=True
-        ).exclude(id=self.object.id)[:4]
-        
+        record_view(self.object.pk)
+
         # Add review-related context
         reviews = self.object.reviews.filter(is_approved=True).order_by('-created_at')
         context['reviews'] = reviews[:10]  # Show first 10 reviews
@@ -45,13 +77,7 @@ class ProductDetailView(DetailView):
             context['can_review'] = user_review is None  # User can review if they haven't already
             
             # Check if user has purchased this product (for verification info)
-            from orders.models import OrderItem
-            has_purchased = OrderItem.objects.filter(
-                order__user=self.request.user,
-                product=self.object,
-                order__status__in=['delivered', 'completed']
-            ).exists()
-            context['user_has_purchased'] = has_purchased
+            context['user_has_purchased'] = has_purchased(self.request.user.id, self.object.id)
             
             context['review_form'] = ReviewForm() if context['can_review'] else None
         
@@ -69,8 +95,89 @@ class ProductDetailView(DetailView):
         
         return context
 
+class AsyncProductListView(View):
+    """ProductListView for ASGI deployments, built on the async ORM"""
+    template_name = 'products/list.html'
+    paginate_by = 20
+    use_read_replica = True
+
+    async def get(self, request):
+        queryset = product_card_rows(listing_products(request.GET))
+        paginator = Paginator(queryset, self.paginate_by)
+        paginator.count = await queryset.acount()
+        page_number = request.GET.get('page') or 1
+        if page_number == 'last':
+            page_number = paginator.num_pages
+        try:
+            page = paginator.page(page_number)
+        except InvalidPage:
+            raise Http404('Invalid page.')
+        page.object_list = to_cards(await alist(page.object_list))
+        context = {
+            'products': page.object_list,
+            'object_list': page.object_list,
+            'page_obj': page,
+            'paginator': paginator,
+            'is_paginated': page.has_other_pages(),
+            'page_query': listing_query(request.GET),
+        }
+        # context processors (auth, cart) still use the sync ORM
+        return await sync_to_async(render)(request, self.template_name, context)
+
+
+class AsyncProductDetailView(View):
+    """ProductDetailView for ASGI deployments, built on the async ORM"""
+    template_name = 'products/detail.html'
+    use_read_replica = True
+
+    async def get(self, request, slug):
+        try:
+            product = await Product.objects.select_related('vendor', 'category').prefetch_related('images').aget(slug=slug)
+        except Product.DoesNotExist:
+            raise Http404('No product found matching the query')
+        record_view(product.pk)
+        user = await request.auser()
+
+        reviews = product.reviews.filter(is_approved=True).order_by('-created_at')
+        # detail.html does not render related products, so none are fetched here
+        queries = [
+            alist(reviews.select_related('user')[:10]),
+            reviews.acount(),
+            reviews.filter(is_verified=True).acount(),
+            alist(reviews.order_by().values_list('rating').annotate(count=Count('id'))),
+        ]
+        if user.is_authenticated:
+            queries += [
+                reviews.filter(user=user).afirst(),
+                ahas_purchased(user.id, product.id),
+            ]
+        # none of these depend on each other, so await them together
+        results = await asyncio.gather(*queries)
+        latest_reviews, total_reviews, verified_count, rating_rows = results[:4]
+
+        rating_distribution = {i: 0 for i in range(1, 6)}
+        rating_distribution.update(dict(rating_rows))
+        context = {
+            'object': product,
+            'product': product,
+            'reviews': latest_reviews,
+            'total_reviews': total_reviews,
+            'average_rating': product.average_rating,
+            'verified_reviews_count': verified_count,
+            'rating_distribution': rating_distribution,
+        }
+        if user.is_authenticated:
+            user_review, purchased = results[4:]
+            context['user_review'] = user_review
+            context['can_review'] = user_review is None
+            context['user_has_purchased'] = purchased
+            context['review_form'] = ReviewForm() if user_review is None else None
+        return await sync_to_async(render)(request, self.template_name, context)
+
+
 class CategoryDetailView(DetailView):
     model = Category
+    use_read_replica = True
     template_name = 'products/category.html'
     context_object_name = 'category'
     slug_field = 'slug'
@@ -78,7 +185,11 @@ class CategoryDetailView(DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['products'] = self.object.products.filter(is_active=True)
+        products = self.object.products.filter(is_active=True)
+        context['products'] = to_cards(
+            cached_card_rows(f'category:{self.object.pk}', products, 'category', self.object.pk)
+        )
+        context['trending_products'] = trending_cards(self.object.pk, limit=4)
         return context
 
 
@@ -236,6 +347,7 @@ class ReviewDeleteView(LoginRequiredMixin, View):
 
 class ProductReviewsView(ListView):
     model = Review
+    use_read_replica = True
     template_name = 'products/reviews.html'
     context_object_name = 'reviews'
     paginate_by = 20
@@ -258,3 +370,71 @@ class ProductReviewsView(ListView):
         context['rating_distribution'] = rating_distribution
         
         return context
+
+
+class ReviewQueueView(LoginRequiredMixin, View):
+    """Moderation queue walked with keyset pagination on (created_at, id)"""
+    template_name = 'products/review_queue.html'
+    page_size = 50
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and not request.user.is_staff:
+            messages.error(request, 'Only staff members can moderate reviews.')
+            return redirect('core:home')
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_queryset(self):
+        status = self.request.GET.get('status', 'pending')
+        reviews = Review.objects.select_related('user', 'product')
+        if status == 'pending':
+            reviews = reviews.filter(is_approved=False)
+        elif status == 'approved':
+            reviews = reviews.filter(is_approved=True)
+        return reviews.order_by('-created_at', '-id')
+
+    def get(self, request):
+        reviews = self.get_queryset()
+        cursor = self._parse_cursor(request.GET.get('after', ''))
+        if cursor:
+            created_at, review_id = cursor
+            reviews = reviews.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=review_id)
+            )
+        page = list(reviews[:self.page_size + 1])
+        has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+        next_cursor = None
+        if has_next:
+            last = page[-1]
+            next_cursor = f"{last.created_at.isoformat()}|{last.id}"
+        return render(request, self.template_name, {
+            'reviews': page,
+            'status': request.GET.get('status', 'pending'),
+            'next_cursor': next_cursor,
+        })
+
+    def post(self, request):
+        approve = request.POST.get('action') == 'approve'
+        pattern = request.POST.get('pattern', '').strip()
+        back = redirect(f"{reverse('products:review_queue')}?status={request.POST.get('status', 'pending')}")
+        if pattern:
+            regex = bool(request.POST.get('regex'))
+            error = pattern_error(pattern, regex)
+            if error:
+                messages.error(request, error)
+                return back
+            updated = moderate_matching_reviews(pattern, approve, regex=regex)
+        else:
+            review_ids = request.POST.getlist('review_ids')
+            updated = set_review_approval(Review.objects.filter(id__in=review_ids), approve)
+        verb = 'approved' if approve else 'rejected'
+        messages.success(request, f'{updated} review(s) {verb}.')
+        return back
+
+    @staticmethod
+    def _parse_cursor(value):
+        created_at, _, review_id = value.partition('|')
+        created_at = parse_datetime(created_at) if created_at else None
+        if created_at is None or not review_id.isdigit():
+            return None
+        return created_at, int(review_id)
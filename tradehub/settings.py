@@ -79,10 +79,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'core.middleware.ChangeEventBatchMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.throttling.ThrottleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -99,7 +103,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                'orders.context_processors.cart_context',
+                'core.context_processors.cart_context',
             ],
         },
     },
@@ -107,6 +111,23 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'tradehub.wsgi.application'
 
+# Serve the catalog hot paths (product list/detail, vendor storefront) with the
+# async views when running under ASGI (e.g. uvicorn tradehub.asgi:application)
+ASYNC_CATALOG_VIEWS = os.getenv('ASYNC_CATALOG_VIEWS', 'False').lower() == 'true'
+
+
+# Cache shared by every worker process: catalog payloads and their invalidation
+# counters (core.cache), throttle buckets and replica pins. Set REDIS_URL (needs
+# the redis package) whenever more than one process serves requests. Without it
+# each process has its own memory cache, cached pages are kept at most
+# LOCAL_CACHE_TIMEOUT seconds and logged-in clients always read from the primary.
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+LOCAL_CACHE_TIMEOUT = int(os.getenv('LOCAL_CACHE_TIMEOUT', '60'))
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -114,6 +135,23 @@ WSGI_APPLICATION = 'tradehub.wsgi.application'
 # Database configuration based on environment variable
 DATABASE_TYPE = os.getenv('DATABASE_TYPE', 'sqlite').lower()
 
+# SQLite production tuning (WAL, pragmas, BEGIN IMMEDIATE), applied by core/sqlite.py.
+# Compare with `python manage.py benchmark_sqlite`
+SQLITE_PERFORMANCE_PROFILE = os.getenv('SQLITE_PERFORMANCE_PROFILE', 'False').lower() == 'true'
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': SQLITE_BUSY_TIMEOUT_MS,
+    'cache_size': -64000,  # negative means KiB, so ~64MB
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+# Persistent connections: reuse a connection for up to DB_CONN_MAX_AGE seconds
+# and check it is still alive before reusing it for a new request
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+
 if DATABASE_TYPE == 'mariadb':
     DATABASES = {
         'default': {
@@ -123,12 +161,23 @@ if DATABASE_TYPE == 'mariadb':
             'PASSWORD': os.getenv('DB_PASSWORD', ''),
             'HOST': os.getenv('DB_HOST', 'localhost'),
             'PORT': os.getenv('DB_PORT', '3306'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
             'OPTIONS': {
                 'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
                 'charset': 'utf8mb4',
             },
         }
     }
+    # Read replicas: DB_REPLICA_HOSTS=host1:3306,host2:3306 (same credentials as the primary)
+    for index, replica_host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+        host, _, port = replica_host.strip().partition(':')
+        DATABASES[f'replica{index}'] = {
+            **DATABASES['default'],
+            'HOST': host,
+            'PORT': port or DATABASES['default']['PORT'],
+            'TEST': {'MIRROR': 'default'},
+        }
 else:
     # Default to SQLite for development
     DATABASES = {
@@ -137,6 +186,29 @@ else:
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
+    if SQLITE_PERFORMANCE_PROFILE:
+        DATABASES['default']['OPTIONS'] = {
+            # take the write lock at BEGIN instead of failing on lock upgrade
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000,
+        }
+    # Local replica testing: SQLITE_REPLICA_PATHS=replica.sqlite3 (a copy of db.sqlite3,
+    # create it with `migrate --database=replica1` or by copying the primary file)
+    for index, replica_path in enumerate(filter(None, os.getenv('SQLITE_REPLICA_PATHS', '').split(',')), start=1):
+        DATABASES[f'replica{index}'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / replica_path.strip(),
+            'TEST': {'MIRROR': 'default'},
+        }
+
+# Catalog reads go to replicas when any are configured (see core/db_router.py)
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+
+# After a write, keep that client's reads on the primary for this many seconds
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '10'))
+# Pins for token clients and logged-in users. With a per-process cache (no
+# REDIS_URL) they can't be shared, so those clients always read from the primary
+REPLICA_PIN_CACHE = 'default'
 
 
 # Password validation
@@ -176,24 +248,86 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
+# SERVE_STATIC routes STATIC_URL to core.media.serve_static (precompressed variants) outside DEBUG
+SERVE_STATIC = os.getenv('SERVE_STATIC', 'False').lower() == 'true'
+STATIC_CACHE_MAX_AGE = 60 * 5
+
+# Dynamic responses smaller than this are not compressed (core.middleware.CompressionMiddleware)
+COMPRESSION_MIN_BYTES = 1024
 
 # Media files
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Media serving (core/media.py). SERVE_MEDIA routes MEDIA_URL through Django outside DEBUG too;
+# MEDIA_SENDFILE = 'x-accel-redirect' (nginx, internal location at MEDIA_ACCEL_REDIRECT_PREFIX
+# aliased to MEDIA_ROOT) or 'x-sendfile' (Apache/lighttpd) hands the transfer to the front server.
+SERVE_MEDIA = os.getenv('SERVE_MEDIA', 'False').lower() == 'true'
+MEDIA_SENDFILE = os.getenv('MEDIA_SENDFILE', '').lower()
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 60 * 60
+
+# Uploads are stored once per distinct content under blobs/ (core/storage.py)
+STORAGES = {
+    'default': {'BACKEND': 'core.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'core.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+
+# Sitemaps and product feed, written by the generate_sitemaps command (core/sitemaps.py).
+# In production point the web server at SITEMAP_ROOT for SITEMAP_URL.
+SITE_URL = os.getenv('SITE_URL', 'http://localhost:8000')
+SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+SITEMAP_URL = 'sitemaps/'
+SITEMAP_SHARD_SIZE = 50000
+
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.TokenThrottle',
+        'core.throttling.UserThrottle',
+        'core.throttling.IPThrottle',
+    ],
     'PAGE_SIZE': 20
 }
 
+# Product popularity counters are buffered per process and written in one
+# batched upsert at most this often (products.popularity)
+POPULARITY_FLUSH_SECONDS = int(os.getenv('POPULARITY_FLUSH_SECONDS', '30'))
+
+# Token-bucket throttling (core.throttling). Buckets hold `capacity` tokens and
+# refill at `refill_rate` tokens/second; a request spends its view's cost.
+# State lives in THROTTLE_CACHE - point it at a shared cache (e.g. redis) when
+# running several worker processes, otherwise each process counts separately.
+THROTTLE_ENABLED = os.getenv('THROTTLE_ENABLED', 'True').lower() == 'true'
+THROTTLE_CACHE = 'default'
+THROTTLE_BUCKETS = {
+    'ip': {'capacity': 60, 'refill_rate': 1.0},
+    'user': {'capacity': 120, 'refill_rate': 2.0},
+    'token': {'capacity': 600, 'refill_rate': 10.0},
+}
+# assets and the admin are never charged against the page buckets
+THROTTLE_EXEMPT_PATHS = ['/' + url.lstrip('/') for url in (STATIC_URL, MEDIA_URL, SITEMAP_URL, 'admin/')]
+# reverse proxies / load balancers (IPs or CIDRs) whose X-Forwarded-For is
+# believed; from anyone else the header is ignored and REMOTE_ADDR is used
+THROTTLE_TRUSTED_PROXIES = [proxy.strip() for proxy in os.getenv('THROTTLE_TRUSTED_PROXIES', '').split(',') if proxy.strip()]
+# costs for views whose classes don't set `throttle_cost`
+THROTTLE_VIEW_COSTS = {
+    'core:search': 5,
+}
+
+# CachedTokenAuthentication: tokens kept in memory per process, and for how long
+# before a revocation made in another process is picked up
+TOKEN_AUTH_CACHE_SIZE = int(os.getenv('TOKEN_AUTH_CACHE_SIZE', '1024'))
+TOKEN_AUTH_CACHE_TTL = int(os.getenv('TOKEN_AUTH_CACHE_TTL', '60'))
+
 # Login/Logout URLs
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
@@ -1,8 +1,11 @@
 
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
+from core.media import serve_media, serve_static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -10,10 +13,17 @@ urlpatterns = [
     path('vendors/', include('vendors.urls')),
     path('products/', include('products.urls')),
     path('orders/', include('orders.urls')),
+    path('api/v1/', include('products.api_urls')),
     path('api/', include('api.urls')),
     path('accounts/', include('django.contrib.auth.urls')),
 ]
 
+if settings.DEBUG or settings.SERVE_MEDIA:
+    urlpatterns += [re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media)]
+
+if settings.SERVE_STATIC and not settings.DEBUG:
+    urlpatterns += [re_path(r'^%s(?P<path>.*)$' % re.escape(settings.STATIC_URL.lstrip('/')), serve_static)]
+
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += static(settings.SITEMAP_URL, document_root=settings.SITEMAP_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATICFILES_DIRS[0])
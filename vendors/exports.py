@@ -0,0 +1,105 @@
+"""
+Streaming exports of a vendor's catalog and order history.
+
+Rows are read with values_list() in keyset-paginated batches on the primary
+key, then encoded to CSV or JSON Lines and optionally gzipped while
+streaming. Memory stays flat however many rows the vendor has. Batching by
+key rather than holding one big cursor open also keeps memory flat on
+MariaDB, where mysqlclient would otherwise buffer the whole result set.
+"""
+import csv
+import io
+import json
+import zlib
+
+from django.apps import apps
+
+from products.models import Product
+
+EXPORT_BATCH_SIZE = 2000
+FLUSH_BYTES = 64 * 1024
+
+EXPORTS = {
+    'catalog': (
+        'id', 'sku', 'name', 'slug', 'category__name', 'price', 'compare_price', 'condition',
+        'stock_quantity', 'track_inventory', 'is_digital', 'is_active', 'is_featured', 'created_at', 'updated_at',
+    ),
+    'orders': (
+        'id', 'order_id', 'order__order_number', 'order__status', 'order__created_at',
+        'product_id', 'product__sku', 'product__name', 'quantity', 'price', 'total_price',
+    ),
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def export_queryset(dataset, vendor_id):
+    if dataset == 'catalog':
+        return Product.objects.filter(vendor_id=vendor_id)
+    return apps.get_model('orders', 'OrderItem').objects.filter(product__vendor_id=vendor_id)
+
+
+def iter_rows(queryset, columns, batch_size=EXPORT_BATCH_SIZE):
+    """Yield value tuples in primary key order, one keyset batch at a time (``columns[0]`` must be 'id')"""
+    last_id = 0
+    while True:
+        batch = list(
+            queryset.filter(id__gt=last_id).order_by('id').values_list(*columns)[:batch_size]
+        )
+        if not batch:
+            return
+        yield from batch
+        last_id = batch[-1][0]
+
+
+def _buffered(pieces):
+    """Join small encoded rows into larger chunks before handing them to the server"""
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= FLUSH_BYTES:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def encode_csv(columns, rows):
+    line = io.StringIO()
+    writer = csv.writer(line)
+    writer.writerow(columns)
+    yield line.getvalue().encode()
+    for row in rows:
+        line.seek(0)
+        line.truncate()
+        writer.writerow(row)
+        yield line.getvalue().encode()
+
+
+def encode_jsonl(columns, rows):
+    for row in rows:
+        yield (json.dumps(dict(zip(columns, row)), default=str) + '\n').encode()
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(dataset, vendor_id, fmt='csv', compress=False):
+    """Byte chunks for a full export of one vendor's dataset"""
+    columns = EXPORTS[dataset]
+    rows = iter_rows(export_queryset(dataset, vendor_id), columns)
+    encoder = encode_csv if fmt == 'csv' else encode_jsonl
+    chunks = _buffered(encoder(columns, rows))
+    return gzip_chunks(chunks) if compress else chunks
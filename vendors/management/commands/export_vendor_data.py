@@ -0,0 +1,30 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from vendors.exports import EXPORTS, FORMATS, export_stream
+from vendors.models import Vendor
+
+
+class Command(BaseCommand):
+    help = 'streams a vendor catalog or order history to a file (or stdout) as csv or json lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('vendor_id', type=int)
+        parser.add_argument('dataset', choices=sorted(EXPORTS))
+        parser.add_argument('--format', dest='fmt', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true', help='gzip the output while writing')
+        parser.add_argument('--output', '-o', help='file to write, defaults to stdout')
+
+    def handle(self, *args, **options):
+        if not Vendor.objects.filter(pk=options['vendor_id']).exists():
+            raise CommandError(f"Vendor {options['vendor_id']} does not exist.")
+
+        chunks = export_stream(options['dataset'], options['vendor_id'], options['fmt'], options['gzip'])
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                written = sum(output.write(chunk) for chunk in chunks)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {written} bytes to {options['output']}"))
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core import events
+
+from .models import Vendor
+
+
+@receiver(post_save, sender=Vendor)
+def publish_vendor_save(sender, instance, **kwargs):
+    events.publish(sender, [instance.pk], events.SAVED, using=kwargs.get('using'))
+
+
+@receiver(post_delete, sender=Vendor)
+def publish_vendor_delete(sender, instance, **kwargs):
+    events.publish(sender, [instance.pk], events.DELETED, using=kwargs.get('using'))
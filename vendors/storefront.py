@@ -0,0 +1,93 @@
+"""
+Cached vendor storefront payload.
+
+The storefront page needs the vendor's latest product cards, product and
+review counts, the category breakdown and the average rating - five
+queries per view. storefront_payload() computes them together and caches
+the plain result single-flight (core.cache.get_or_compute) under the
+vendor's product cards generation (see products.cards).
+astorefront_context() is the async version. On a miss it runs the five
+queries concurrently on the async ORM.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+
+from django.db.models import Avg, Count
+
+from core.async_utils import alist
+from core.cache import aget_or_compute, get_or_compute
+from products.cards import cards_cache_key, product_card_rows, to_cards
+from products.models import Product, Review
+
+STOREFRONT_TIMEOUT = 60 * 10
+STOREFRONT_PRODUCTS = 12
+
+
+def _storefront_querysets(vendor_id):
+    vendor_products = Product.objects.filter(vendor_id=vendor_id, is_active=True)
+    categories = (
+        vendor_products.values('category__name', 'category__slug')
+        .annotate(product_count=Count('id'))
+        .order_by('-product_count')
+    )
+    reviews = Review.objects.filter(product__vendor_id=vendor_id, is_approved=True)
+    return vendor_products, categories, reviews
+
+
+def _payload(products, products_count, categories, review_stats):
+    return {
+        'products': products,
+        'products_count': products_count,
+        'categories': categories,
+        'reviews_count': review_stats['count'],
+        'rating': review_stats['avg_rating'] or 0,
+    }
+
+
+def compute_storefront(vendor_id):
+    vendor_products, categories, reviews = _storefront_querysets(vendor_id)
+    return _payload(
+        list(product_card_rows(vendor_products)[:STOREFRONT_PRODUCTS]),
+        vendor_products.count(),
+        list(categories),
+        reviews.aggregate(count=Count('id'), avg_rating=Avg('rating')),
+    )
+
+
+async def acompute_storefront(vendor_id):
+    vendor_products, categories, reviews = _storefront_querysets(vendor_id)
+    return _payload(*await asyncio.gather(
+        alist(product_card_rows(vendor_products)[:STOREFRONT_PRODUCTS]),
+        vendor_products.acount(),
+        alist(categories),
+        reviews.aaggregate(count=Count('id'), avg_rating=Avg('rating')),
+    ))
+
+
+def _storefront_key(vendor_id):
+    return cards_cache_key(f'storefront:{vendor_id}', 'vendor', vendor_id)
+
+
+def storefront_payload(vendor_id):
+    return get_or_compute(_storefront_key(vendor_id), lambda: compute_storefront(vendor_id), STOREFRONT_TIMEOUT)
+
+
+def _context(payload):
+    return {
+        'vendor_products': to_cards(payload['products']),
+        'vendor_products_count': payload['products_count'],
+        'vendor_categories': payload['categories'],
+        'vendor_reviews_count': payload['reviews_count'],
+        'vendor_rating': payload['rating'],
+    }
+
+
+def storefront_context(vendor_id):
+    """Template context for vendors/detail.html, minus the vendor itself"""
+    return _context(storefront_payload(vendor_id))
+
+
+async def astorefront_context(vendor_id):
+    key = await sync_to_async(_storefront_key)(vendor_id)
+    return _context(await aget_or_compute(key, lambda: acompute_storefront(vendor_id), STOREFRONT_TIMEOUT))
@@ -1,13 +1,15 @@
-from django.urls import path
+from django.conf import settings
+from django.urls import path, re_path
 from . import views
 
 app_name = 'vendors'
 
 urlpatterns = [
     path('', views.VendorListView.as_view(), name='list'),
-    path('<int:pk>/', views.VendorDetailView.as_view(), name='detail'),
+    path('<int:pk>/', views.AsyncVendorDetailView.as_view() if settings.ASYNC_CATALOG_VIEWS else views.VendorDetailView.as_view(), name='detail'),
     path('<int:pk>/edit/', views.VendorUpdateView.as_view(), name='update'),
     path('<int:pk>/delete/', views.VendorDeleteView.as_view(), name='delete'),
     path('dashboard/', views.VendorDashboardView.as_view(), name='dashboard'),
     path('register/', views.VendorRegisterView.as_view(), name='register'),
+    re_path(r'^export/(?P<dataset>catalog|orders)\.(?P<fmt>csv|jsonl)(?P<gz>\.gz)?$', views.VendorExportView.as_view(), name='export'),
 ]
\ No newline at end of file
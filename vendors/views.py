@@ -1,62 +1,68 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import ListView, DetailView, TemplateView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.models import Group
 from django.contrib import messages
-from django.db.models import Count, Avg, Sum
+from django.db.models import Avg, Sum
+from django.http import Http404, StreamingHttpResponse
 from django.urls import reverse_lazy
-from products.models import Product, Review
+from django.views import View
+from products.deletion import schedule_deletion
+from products.models import DeletionJob, Review
 from orders.models import OrderItem
 from core.twitter_utils import post_to_twitter, generate_new_vendor_tweet
+from .exports import FORMATS, export_stream
 from .models import Vendor
+from .storefront import astorefront_context, storefront_context
 
 class VendorListView(ListView):
     model = Vendor
+    use_read_replica = True
     template_name = 'vendors/list.html'
     context_object_name = 'vendors'
     paginate_by = 20
     
     def get_queryset(self):
         # Show all vendors, not just verified ones for better user experience
-        return Vendor.objects.all().order_by('-created_at')
+        return Vendor.objects.exclude(pk__in=DeletionJob.objects.pending_ids(Vendor)).order_by('-created_at')
 
 class VendorDetailView(DetailView):
     model = Vendor
+    use_read_replica = True
+    throttle_cost = 3
     template_name = 'vendors/detail.html'
     context_object_name = 'vendor'
 
+    def get_queryset(self):
+        return Vendor.objects.exclude(pk__in=DeletionJob.objects.pending_ids(Vendor))
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        vendor = self.object
-        
-        # Get vendor products and stats
-        vendor_products = Product.objects.filter(vendor=vendor, is_active=True)
-        context['vendor_products'] = vendor_products[:12]  # Show latest 12 products
-        context['vendor_products_count'] = vendor_products.count()
-        
-        # Get categories with product counts for this vendor
-        categories = vendor_products.values(
-            'category__name', 'category__slug'
-        ).annotate(
-            product_count=Count('id')
-        ).order_by('-product_count')
-        context['vendor_categories'] = categories
-        
-        # Get reviews for vendor's products
-        vendor_reviews = Review.objects.filter(
-            product__vendor=vendor, 
-            is_approved=True
-        )
-        context['vendor_reviews_count'] = vendor_reviews.count()
-        
-        # Calculate average rating
-        avg_rating = vendor_reviews.aggregate(
-            avg_rating=Avg('rating')
-        )['avg_rating']
-        context['vendor_rating'] = avg_rating if avg_rating else 0
-        
+        context.update(storefront_context(self.object.pk))
         return context
 
+class AsyncVendorDetailView(View):
+    """VendorDetailView for ASGI deployments, built on the async ORM"""
+    template_name = 'vendors/detail.html'
+    use_read_replica = True
+    throttle_cost = 3
+
+    async def get(self, request, pk):
+        try:
+            vendor = await Vendor.objects.select_related('user').exclude(
+                pk__in=DeletionJob.objects.pending_ids(Vendor)
+            ).aget(pk=pk)
+        except Vendor.DoesNotExist:
+            raise Http404('No vendor found matching the query')
+
+        context = {
+            'object': vendor,
+            'vendor': vendor,
+            **await astorefront_context(vendor.pk),
+        }
+        return await sync_to_async(render)(request, self.template_name, context)
+
 class VendorDashboardView(LoginRequiredMixin, TemplateView):
     template_name = 'vendors/dashboard.html'
     
@@ -97,6 +103,26 @@ class VendorDashboardView(LoginRequiredMixin, TemplateView):
         
         return context
 
+class VendorExportView(LoginRequiredMixin, View):
+    """Stream the vendor's catalog or order history as CSV / JSON Lines, optionally gzipped"""
+    throttle_cost = 20
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and not hasattr(request.user, 'vendor'):
+            messages.error(request, 'You must be a registered vendor to export data.')
+            return redirect('vendors:register')
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request, dataset, fmt, gz=None):
+        compress = bool(gz)
+        response = StreamingHttpResponse(
+            export_stream(dataset, request.user.vendor.id, fmt, compress),
+            content_type='application/gzip' if compress else FORMATS[fmt],
+        )
+        filename = f"{dataset}.{fmt}{'.gz' if compress else ''}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
 class VendorRegisterView(LoginRequiredMixin, CreateView):
     model = Vendor
     template_name = 'vendors/register.html'
@@ -179,8 +205,13 @@ class VendorDeleteView(LoginRequiredMixin, DeleteView):
             return redirect('vendors:dashboard')
         return super().dispatch(request, *args, **kwargs)
     
-    def delete(self, request, *args, **kwargs):
-        vendor = self.get_object()
+    def get_queryset(self):
+        return Vendor.objects.exclude(pk__in=DeletionJob.objects.pending_ids(Vendor))
+
+    def form_valid(self, form):
+        """Hide the store now and delete it with its catalog in the background"""
+        request = self.request
+        vendor = self.object
         store_name = vendor.store_name
         
         # Remove user from vendors group
@@ -198,5 +229,6 @@ class VendorDeleteView(LoginRequiredMixin, DeleteView):
             buyers_group, _ = Group.objects.get_or_create(name='Buyers')
             request.user.groups.add(buyers_group)
         
+        schedule_deletion(vendor, requested_by=request.user)
         messages.success(request, f'Store "{store_name}" has been deleted successfully.')
-        return super().delete(request, *args, **kwargs)
+        return redirect(self.get_success_url())